@@ -3,4 +3,5 @@ from .chemkin207 import IrreversibleReaction
 from .chemkin207 import ReversibleReaction
 from .chemkin207 import Reaction
 from .chemkin207 import MultiReactionOutput
+from .chemkin207 import NASATable
 from ._tester import test
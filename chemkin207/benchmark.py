@@ -0,0 +1,161 @@
+"""
+    Benchmark suite of the evaluation, thermo and I/O hot paths of chemkin207.
+
+    Every benchmark is run on mechanisms of increasing size and timed with time.perf_counter,
+    and the results are written as JSON so that releases can be compared. It runs offline,
+    with synthetic mechanisms written by chemkin207.synthetic from a fixed seed. Run it with
+
+        python -m chemkin207.benchmark --out results.json
+    """
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import tempfile
+import argparse
+import contextlib
+import numpy as np
+
+from .chemkin207 import ReactionSet, MultiReactionOutput, ReversibleReaction, TABLE_EXTENSIONS
+from .synthetic import synthetic_mechanism
+
+# Default (species, reactions) of the benchmark mechanisms
+SIZES = ((10, 10), (30, 100), (53, 1000))
+# Version of the layout of the JSON results
+RESULTS_VERSION = 2
+
+def measure(func, repeat=5, number=1):
+    """This function times func, taking the per call time of number calls, repeat times.
+    --------
+    Args:   func, callable with no arguments
+            repeat, int - the number of timings
+            number, int - the number of calls in each timing
+    --------
+    Returns: dict with the per call 'times' in seconds, and their 'best' and 'median'
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        times.append((time.perf_counter() - start) / number)
+    return {'times': times, 'best': min(times), 'median': float(np.median(times)),
+            'repeat': repeat, 'number': number}
+
+def _has_h5py():
+    try:
+        import h5py
+    except ImportError:
+        return False
+    return True
+
+def mechanism_benchmarks(xml_doc, out_dir, repeat=5, n_temps=1000, number=20):
+    """This function times the hot paths on one mechanism.
+    --------
+    Args:   xml_doc, str - the mechanism
+            out_dir, str - the directory the tables are written to
+            repeat, int - the number of timings of each benchmark
+            n_temps, int - the number of temperatures of the sweeps and tables
+            number, int - the number of calls in each timing of the single temperature benchmarks
+    --------
+    Returns: list of dicts, one per benchmark with its 'name', 'params' and timings (see measure)
+    """
+    rs = ReactionSet(xml_doc)
+    x = np.linspace(0.5, 2., len(rs.species))
+    temps = np.linspace(300., 3000., n_temps)
+    T = 1500.
+    reversible = [r for r in rs.reactions if isinstance(r, ReversibleReaction)]
+    query = list(rs.species[:3])
+    cases = [
+        ('get_reactions', {}, lambda: rs.get_reactions(xml_doc), 1),
+        ('reaction_coefs', {'T': T}, lambda: rs.reaction_coefs(T), number),
+        ('progress_rates', {'T': T}, lambda: rs.progress_rates(x, T), number),
+        ('reaction_rates', {'T': T}, lambda: rs.reaction_rates(x, T), number),
+        ('progress_rates', {'n_temps': n_temps}, lambda: rs.progress_rates(x, temps), 1),
+        ('reaction_rates', {'n_temps': n_temps}, lambda: rs.reaction_rates(x, temps), 1),
+    ]
+    if reversible:
+        cases.append(('get_nasa_coefs', {'T': T}, lambda: reversible[0].get_nasa_coefs(T), number))
+    for out_type in TABLE_EXTENSIONS:
+        if out_type == 'hdf5' and not _has_h5py():
+            continue
+        out_file = os.path.join(out_dir, 'table')
+        cases.append(('to_table', {'out_type': out_type, 'n_temps': n_temps},
+                      lambda out_type=out_type: rs.to_table(query, x, temps, out_file, out_type), 1))
+    multi = MultiReactionOutput([rs, ReactionSet(xml_doc)])
+    cases.append(('to_table_multi', {'out_type': 'csv', 'n_temps': n_temps, 'reaction_sets': 2},
+                  lambda: multi.to_table_multi(query, [x, x], temps, os.path.join(out_dir, 'multi'), 'csv'), 1))
+
+    results = []
+    for name, params, func, calls in cases:
+        result = {'name': name, 'params': params}
+        result.update(measure(func, repeat, calls))
+        results.append(result)
+    return results
+
+def run(sizes=SIZES, repeat=5, n_temps=1000, number=20, reversible=0.5, seed=0):
+    """This function runs the benchmark suite over synthetic mechanisms of the given sizes.
+    --------
+    Args:   sizes, list of (int, int) - the number of species and of reactions of each mechanism
+            repeat, n_temps, number - as for mechanism_benchmarks
+            reversible, float - the fraction of reversible reactions of the mechanisms
+            seed, int - the seed of the synthetic mechanisms
+    --------
+    Returns: dict with the 'environment' of the run and the 'results', one dict per benchmark and
+             mechanism, the mechanism described by its number of 'species', 'reactions' and
+             'reversible' reactions, and its 'seed'
+    """
+    work_dir = tempfile.mkdtemp()
+    try:
+        # the table methods print each file they write
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            results = []
+            for n_species, n_reactions in sizes:
+                xml_doc = synthetic_mechanism(os.path.join(work_dir, 'mechanism.xml'), n_species, n_reactions,
+                                              reversible, seed=seed)
+                rs = ReactionSet(xml_doc)
+                mechanism = {'species': len(rs.species), 'reactions': len(rs.As), 'reversible': rs.number_reverse,
+                             'seed': seed}
+                for result in mechanism_benchmarks(xml_doc, work_dir, repeat, n_temps, number):
+                    result['mechanism'] = mechanism
+                    results.append(result)
+    finally:
+        shutil.rmtree(work_dir)
+
+    environment = {'python': platform.python_version(), 'numpy': np.__version__,
+                   'platform': platform.platform(), 'processor': platform.processor(),
+                   'cpus': os.cpu_count(), 'time': time.strftime('%Y-%m-%dT%H:%M:%S')}
+    return {'version': RESULTS_VERSION, 'environment': environment, 'results': results}
+
+def _size(text):
+    # a mechanism size of the command line, as species:reactions
+    try:
+        n_species, n_reactions = text.split(':')
+        return int(n_species), int(n_reactions)
+    except ValueError:
+        raise argparse.ArgumentTypeError('a size must be species:reactions, not {}'.format(text))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the chemkin207 hot paths.')
+    parser.add_argument('--out', default=None, help='JSON file to write the results to (default: stdout)')
+    parser.add_argument('--sizes', type=_size, nargs='+', default=list(SIZES),
+                        help='species:reactions of each synthetic mechanism')
+    parser.add_argument('--repeat', type=int, default=5, help='number of timings of each benchmark')
+    parser.add_argument('--temps', type=int, default=1000, help='number of temperatures of the sweeps')
+    parser.add_argument('--reversible', type=float, default=0.5, help='fraction of reversible reactions')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the synthetic mechanisms')
+    args = parser.parse_args(argv)
+
+    report = run(args.sizes, args.repeat, args.temps, reversible=args.reversible, seed=args.seed)
+    if args.out is None:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+        print("Output benchmark results to file: {}".format(args.out))
+
+if __name__ == '__main__':
+    main()
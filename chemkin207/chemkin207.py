@@ -4,15 +4,135 @@ from functools import reduce
 import os
 import xml.etree.ElementTree as ET
 import sqlite3
+import threading
+import queue
+import hashlib
+import shutil
+import tempfile
+from collections import OrderedDict, deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from contextlib import ExitStack
+from urllib.request import pathname2url
 import csv
-import matplotlib as mpl
-#if os.environ.get('DISPLAY','') == '':
-#    print('no display found. Using non-interactive Agg backend')
-#    mpl.use('Agg')
-import matplotlib.pyplot as plt
-import h5py
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+COEF_DB = os.path.join(BASE_DIR, "supporting/COEF.sqlite")
+
+# Working memory (in bytes) targeted by each chunk of the batch rate methods
+BATCH_BYTES = 32 * 2**20
+# Number of temperatures evaluated at once by the temperature sweeps
+SWEEP_CHUNK = 256
+# Number of sweep chunks sent to a worker process in one task
+SWEEP_TASK = 16
+# Size in bytes of the blocks written by the streaming HDF5 output
+HDF5_BLOCK = 2**20
+# Number of rows formatted and written at once by the csv, txt and latex tables
+TABLE_CHUNK = 2**14
+# Number of tables queued for the background table writer before the computation waits
+WRITER_QUEUE = 2
+# File extension of each table output type
+TABLE_EXTENSIONS = OrderedDict([('csv', '.csv'), ('txt', '.txt'), ('latex', '.tex'), ('hdf5', '.hdf5')])
+# Version of the compiled mechanism format, part of the key of every compiled mechanism
+COMPILED_VERSION = 1
+# Arrays of a compiled mechanism, each stored as <name>.npy
+COMPILED_ARRAYS = ('species', 'reactants_species', 'reactants_reactions', 'reactants_values',
+                   'products_species', 'products_reactions', 'products_values',
+                   'As', 'bs', 'Es', 'ks', 'Rs', 'p0s', 'coeftypes', 'reversible')
+COMPILED_THERMO = ('tlow', 'tmid', 'thigh', 'low', 'high')
+
+# matplotlib and h5py are slow to import and only needed for plots and hdf5 tables,
+# so they are imported on first use rather than with the package
+def _pyplot():
+    """This function imports and returns matplotlib.pyplot.
+    --------
+    Raises: ImportError if matplotlib is not installed
+    """
+    try:
+        import matplotlib as mpl
+    except ImportError:
+        raise ImportError("You need matplotlib to plot the reaction rates")
+    #if os.environ.get('DISPLAY','') == '':
+    #    print('no display found. Using non-interactive Agg backend')
+    #    mpl.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
+
+def _solve_ivp():
+    """This function imports and returns scipy.integrate.solve_ivp.
+    --------
+    Raises: ImportError if scipy is not installed
+    """
+    try:
+        from scipy.integrate import solve_ivp
+    except ImportError:
+        raise ImportError("You need scipy to integrate the species concentrations")
+    return solve_ivp
+
+def _h5py():
+    """This function imports and returns h5py.
+    --------
+    Raises: ImportError if h5py is not installed
+    """
+    try:
+        import h5py
+    except ImportError:
+        raise ImportError("You need h5py to read or write hdf5 files")
+    return h5py
+
+# Read-only connections to the NASA coefficient databases, one per thread and database file
+_coef_connections = threading.local()
+
+def _mechanism_key(xml_doc, db_loc=None):
+    """This function returns the key of the compiled form of a mechanism: the SHA-256 hash of the
+    xml content, the compiled format version and the size and modification time of the NASA
+    coefficient database the thermodynamic arrays come from.
+    --------
+    Args: xml_doc; path of the xml file
+          db_loc; path of the SQLite database, defaults to supporting/COEF.sqlite
+    --------
+    Returns: str, hexadecimal digest
+    """
+    digest = hashlib.sha256()
+    with open(xml_doc, 'rb') as f:
+        for block in iter(lambda: f.read(2**20), b''):
+            digest.update(block)
+    db = os.stat(db_loc or COEF_DB)
+    digest.update('{}:{}:{}'.format(COMPILED_VERSION, db.st_size, db.st_mtime_ns).encode())
+    return digest.hexdigest()
+
+def _nasa_properties(a, T):
+    """This function evaluates the NASA polynomials of the species at each temperature.
+    --------
+    Args: a; np array nTxSx7, the NASA coefficients of each specie at each temperature (see NASATable.coefs)
+          T; np array of length nT, temperatures
+    --------
+    Returns: H_RT, S_R; np arrays nTxS, the dimensionless enthalpy and entropy
+    """
+    T = T.reshape(-1,1)
+
+    H_RT = (a[:,:,0] + a[:,:,1] * T / 2.0 + a[:,:,2] * T**2.0 / 3.0 + a[:,:,3] * T**3.0 / 4.0 \
+                                                               + a[:,:,4] * T**4.0 / 5.0 + a[:,:,5] / T)
+    S_R = (a[:,:,0] * np.log(T) + a[:,:,1] * T + a[:,:,2] * T**2.0 / 2.0 + a[:,:,3] * T**3.0 / 3.0 \
+                                                                   + a[:,:,4] * T**4.0 / 4.0 + a[:,:,6])
+    return H_RT, S_R
+
+def _coef_db(db_loc=None):
+    """This function returns the read-only connection to a NASA coefficient database for the
+    calling thread, opening it on first use. Connections are reused across every NASATable and
+    ReversibleReaction of the thread, and sqlite3 keeps their prepared statements cached.
+    --------
+    Args: db_loc; path of the SQLite database, defaults to supporting/COEF.sqlite
+    --------
+    Returns: sqlite3.Connection
+    """
+    db_loc = os.path.abspath(db_loc or COEF_DB)
+    connections = getattr(_coef_connections, 'connections', None)
+    if connections is None:
+        connections = _coef_connections.connections = {}
+    if db_loc not in connections:
+        connections[db_loc] = sqlite3.connect('file:{}?mode=ro'.format(pathname2url(db_loc)), uri=True)
+    return connections[db_loc]
 
 class ReactionSet:
     """
@@ -28,14 +148,26 @@ class ReactionSet:
     or more of these parameters is rendered useless or NA for a reaction it is given the
     value NaN. Coeftype is a list of strings containing the type of reaction.
 
+    On initialization the reactions are compiled into the full SxR v' and v'' matrices and
+    length R arrays of A, b, E, k and coeftype, so the rate methods evaluate every reaction
+    with a handful of array operations instead of looping over the Reaction objects.
+
+    The rate methods keep their results out of the ReactionSet and Reaction objects, so one
+    ReactionSet can be evaluated from several threads at once, at different temperatures.
+    Only set_params, tabulate and untabulate modify the set, and they should not run while
+    other threads are evaluating it.
+
     ----------
     Args: xml_doc; where xml_doc is the reaction definition xml.
+          cache_size; int, when positive the forward and backward coefficients of up to cache_size
+                      temperatures are kept in an LRU cache (off by default).
 
     ----------
     Methods:
         reaction_rates(self,x,T): where x is the vector of concentrations of the system and
                             T is the temperature the system of reactions occurs at.
-                            Gets reaction rates from reaction classes
+                            Gets reaction rates from reaction classes. T may also be
+                            a 1-D array of temperatures, giving an nTxS array of rates.
 
         reaction_coef(Temperature); where Temperature is the specified temperature.
                             Returns the 'k' reaction coefficients for each reaction
@@ -45,13 +177,31 @@ class ReactionSet:
         progress_rates(x, T); where x is the vector of concentrations of the system and
                             T is the temperature the system of reactions occurs at. Gets
                             progress rates from reaction classes for each reaction in
-                            the system
+                            the system. T may also be a 1-D array of temperatures,
+                            giving an nTxR array of progress rates.
                             (wrapper)
 
+        reaction_rates_batch(x, T, chunk_size=None); where x is an NxS array with one concentration
+                            vector per row and T holds the temperature of each row. Returns the
+                            NxS reaction rates, evaluated chunk_size rows at a time.
+
+        progress_rates_batch(x, T, chunk_size=None); as reaction_rates_batch, returning the NxR
+                            progress rates.
+
         reaction_coefs(T); where T is the temperature the system of reactions occurs at.
-                            Gets reaction coefficients from Reactions class
+                            Gets reaction coefficients from Reactions class. For a 1-D
+                            array of temperatures returns nTxR arrays (kf, kb).
                             (wrapper)
 
+        tabulate(tmin, tmax, rtol=1e-6); Precomputes the reaction coefficients on a grid over
+                            [tmin, tmax] fine enough for a relative error below rtol, after which
+                            they are found by interpolation in log k against 1/T.
+                            untabulate() goes back to the exact evaluation.
+
+        cache_info(); Returns the hits, misses, maxsize and currsize of the coefficient cache.
+                            The cache is emptied by set_params, and by cache_clear() along with
+                            its statistics.
+
         get_params(); Returns the current parameters of the reaction (in dict)
 
         set_params(idx, **kwargs); where you specify idx to be the index of the reaction
@@ -113,42 +263,827 @@ class ReactionSet:
 
     """
 
-    def __init__(self, xml_doc):
-        self.param_dict = self.get_reactions(xml_doc)
-        self.species = self.param_dict['species']
-        self.reactions = []
-        self.number_reverse = 0
-        for r in self.param_dict['reactions']:
-            if r['reversible']:
-                self.number_reverse+=1
-                self.reactions.append(ReversibleReaction(r,self.species))
-            else:
-                self.reactions.append(IrreversibleReaction(r,self.species))
+    def __init__(self, xml_doc, cache_size=0, compiled_dir=None):
+        # Optional LRU cache of the coefficients, keyed by temperature
+        self._cache = CoefCache(cache_size) if cache_size else None
+        # Optional table of the coefficients for interpolation, see tabulate
+        self.table = None
+        # Parsed reaction data and reaction objects, built on first use for compiled mechanisms
+        self._param_dict, self._reactions = None, None
+
+        # Optional directory of compiled mechanisms, keyed by the hash of the xml content
+        compiled = None
+        if compiled_dir is not None:
+            compiled = os.path.join(compiled_dir, _mechanism_key(xml_doc))
+        if compiled is not None and os.path.isdir(compiled):
+            self._load_compiled(compiled)
+        else:
+            self._param_dict = self.get_reactions(xml_doc)
+            self.species = self._param_dict['species']
+            # NASA coefficients of the species, loaded once for all the reversible reactions
+            self.thermo = None
+            if any(r['reversible'] for r in self._param_dict['reactions']):
+                self.thermo = NASATable(self.species)
+            # The sparse stoichiometric matrices, built directly by the parser
+            self.reactants = self._param_dict['reactants']
+            self.products = self._param_dict['products']
+            self._compile_parameters()
+            if compiled is not None:
+                self._save_compiled(compiled)
+        self.number_reverse = int(np.sum(self.reversible))
+
+        self.net = self.products - self.reactants
+        self.gammas = self.net.to_reactions(np.ones(len(self.species)))
+        # entry pairs of the jacobian products nu @ (d/dx of the reactant and product terms).T
+        self._jac_pairs = self.net.pairs(self.reactants), self.net.pairs(self.products)
+        self._compile_masks()
+
+    @property
+    def param_dict(self):
+        # the parsed reaction data (see get_reactions), rebuilt from the arrays of a compiled mechanism
+        if self._param_dict is None:
+            self._param_dict = self._reaction_dicts()
+        return self._param_dict
+
+    @property
+    def reactions(self):
+        # the reaction objects, built on first use
+        if self._reactions is None:
+            self._reactions = [ReversibleReaction(r,self.species,self.thermo) if r['reversible'] \
+                               else IrreversibleReaction(r,self.species) for r in self.param_dict['reactions']]
+        return self._reactions
+
+    def _reaction_dicts(self):
+        # the reaction data of get_reactions, from the compiled arrays
+        reactions = []
+        for j in range(len(self.As)):
+            react = {'reversible': bool(self.reversible[j]), 'coeftype': str(self.coeftypes[j]),
+                     'A': float(self.As[j]), 'b': float(self.bs[j]), 'E': float(self.Es[j]), 'k': float(self.ks[j]),
+                     'reactants': self.reactants.column(j), 'products': self.products.column(j)}
+            reactions.append(ReactionDict(len(self.species), react))
+        return {'species': self.species, 'reactions': reactions,
+                'reactants': self.reactants, 'products': self.products}
+
+    def _save_compiled(self, path):
+        """ This function writes the compiled form of the mechanism, one .npy file per array, to the
+        directory path. The files are written to a temporary directory that is then renamed, so
+        concurrent workers never see a partial mechanism.
+        -------
+        Args: path; str, the directory of the compiled mechanism
+        """
+        arrays = {'species': self.species, 'As': self.As, 'bs': self.bs, 'Es': self.Es, 'ks': self.ks,
+                  'Rs': self.Rs, 'p0s': self.p0s, 'coeftypes': self.coeftypes, 'reversible': self.reversible}
+        for tag in ('reactants', 'products'):
+            stoich = getattr(self, tag)
+            arrays.update({tag+'_species': stoich.species, tag+'_reactions': stoich.reactions,
+                           tag+'_values': stoich.values})
+        if self.thermo is not None:
+            arrays.update({name: getattr(self.thermo, name) for name in COMPILED_THERMO})
+
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        tmp = tempfile.mkdtemp(dir=parent, prefix='.compiling-')
+        try:
+            for name, array in arrays.items():
+                np.save(os.path.join(tmp, name + '.npy'), np.asarray(array))
+            os.rename(tmp, path)
+        except OSError:
+            # another process compiled the same mechanism first
+            if not os.path.isdir(path):
+                raise
+        finally:
+            if os.path.isdir(tmp):
+                shutil.rmtree(tmp)
+
+    def _load_compiled(self, path):
+        """ This function loads the compiled form of a mechanism written by _save_compiled. The
+        numeric arrays are memory mapped rather than read.
+        -------
+        Args: path; str, the directory of the compiled mechanism
+        """
+        arrays = {name: np.load(os.path.join(path, name + '.npy'), mmap_mode='r') for name in COMPILED_ARRAYS}
+        self.species = np.array(arrays['species'])
+        shape = (len(self.species), len(arrays['As']))
+        for tag in ('reactants', 'products'):
+            setattr(self, tag, Stoichiometry(arrays[tag+'_species'], arrays[tag+'_reactions'],
+                                             arrays[tag+'_values'], shape))
+        for name in ('As', 'bs', 'Es', 'ks', 'Rs', 'p0s', 'coeftypes', 'reversible'):
+            setattr(self, name, arrays[name])
+
+        self.thermo = None
+        if np.any(self.reversible):
+            self.thermo = NASATable.from_arrays(self.species, *[np.load(os.path.join(path, name + '.npy'), \
+                                                mmap_mode='r') for name in COMPILED_THERMO])
+
+    def _compile(self):
+        """ This function assembles the full mechanism arrays from the reaction objects,
+        so the rates for all reactions can be found with a handful of array operations.
+        It is called on initialization and again whenever set_params changes a reaction.
+        -------
+        Args: None
+        -------
+        Returns: None, but sets the attributes of _compile_parameters and _compile_masks
+        """
+        self._compile_parameters()
+        self._compile_masks()
+
+    def _compile_parameters(self):
+        """ This function assembles the parameter arrays of the mechanism from the reaction objects,
+        or from the parsed reaction data while the objects have not been built, so parsing a mechanism
+        does not build them (nor their dense vprime and v2prime vectors).
+        -------
+        Args: None
+        -------
+        Returns: None, but sets the following attributes:
+                 As, bs, Es, ks, Rs, p0s: np arrays of length R with the parameters of each reaction
+                 coeftypes: np array of length R of the coefficient type strings
+                 reversible: np boolean array of length R, True for reversible reactions
+        -------
+        Raises: ValueError if an Arrhenius or modified Arrhenius reaction has an A value that is not
+                strictly positive, as for the reaction objects
+        """
+        if self._reactions is None:
+            reacts = self.param_dict['reactions']
+            self.As = np.array([r['A'] for r in reacts], dtype=float)
+            self.bs = np.array([r['b'] for r in reacts], dtype=float)
+            self.Es = np.array([r['E'] for r in reacts], dtype=float)
+            self.ks = np.array([r['k'] for r in reacts], dtype=float)
+            self.Rs = np.full(len(reacts), 8.314)
+            self.p0s = np.full(len(reacts), 1.0e+05)
+            self.coeftypes = np.array([r['coeftype'] for r in reacts])
+            self.reversible = np.array([r['reversible'] for r in reacts], dtype=bool)
+            if np.any((self.coeftypes != 'Constant') & (self.As <= 0)):
+                raise ValueError('Your A value should be strictly positive. Hint: an A value is less than 0')
+            return
+
+        reacts = self.reactions
+
+        self.As = np.array([r.A for r in reacts], dtype=float)
+        self.bs = np.array([r.b for r in reacts], dtype=float)
+        self.Es = np.array([r.E for r in reacts], dtype=float)
+        self.ks = np.array([r.k for r in reacts], dtype=float)
+        self.Rs = np.array([r.R for r in reacts], dtype=float)
+        self.p0s = np.array([getattr(r, 'p0', 1.0e+05) for r in reacts], dtype=float)
+        self.coeftypes = np.array([r.coeftype for r in reacts])
+        self.reversible = np.array([r.rev for r in reacts], dtype=bool)
+
+    def _compile_masks(self):
+        # coefficient type masks of the mechanism arrays, and invalidation of the stored coefficients
+        self._constant = self.coeftypes == 'Constant'
+        self._arrh = self.coeftypes == 'Arrhenius'
+        self._mod_arrh = self.coeftypes == 'modifiedArrhenius'
+
+        # Cached and tabulated coefficients are stale once the parameters change
+        if self._cache is not None:
+            self._cache.invalidate()
+        if self.table is not None:
+            self.tabulate(self.table.tmin, self.table.tmax, self.table.rtol, self.table.max_points)
+
+    @property
+    def vprime(self):
+        # dense SxR reactant stoichiometric matrix
+        return self.reactants.toarray()
+
+    @property
+    def v2prime(self):
+        # dense SxR product stoichiometric matrix
+        return self.products.toarray()
+
+    @property
+    def nu(self):
+        # dense SxR net stoichiometric matrix
+        return self.net.toarray()
+
+    def _check_temps(self, T, t_err=None):
+        """ This function validates and converts the temperature passed to the rate methods.
+        T may be a single temperature or a 1-D array of temperatures.
+        -------
+        Args: T; float or 1-D array of floats, the strictly positive temperature(s)
+              t_err; exception type raised when T cannot be cast to a float, defaults to the
+                     type of the error raised by the cast
+        -------
+        Returns: temps, np array of length nT, and scalar, True if T was a single temperature
+        -------
+        Raises: ValueError when any temperature is less than 0 or T has more than one dimension
+        """
+        try:
+            temps = np.array(T, dtype=float)
+        except (TypeError, ValueError) as err:
+            raise (t_err or type(err))('Your value for temp must be a float, not {}'.format(T))
+
+        if temps.ndim > 1:
+            raise ValueError('Your temperatures must be a float or a 1-D array, not of shape {}'.format(temps.shape))
+
+        if np.any(temps < 0):
+            raise ValueError('Your T value should be positive. It was {}.'.format(temps[temps < 0][0]))
+        return np.atleast_1d(temps), temps.ndim == 0
+
+    def _check_inputs(self, x_in, T, t_err=None):
+        """ This function validates and converts the concentrations and temperature
+        passed to the rate methods.
+        -------
+        Args: x_in; vector, numpy array (or list) of length equal to the number of species.
+              T; float or 1-D array of floats, the strictly positive temperature(s)
+              t_err; exception type raised when T cannot be cast to a float, defaults to the
+                     type of the error raised by the cast
+        -------
+        Returns: x, np array of length S, temps, np array of length nT, and scalar, True if T
+                 was a single temperature
+        -------
+        Raises: ValueError when x is not of length S or temp is less than 0
+        """
+        try:
+            x = np.array(x_in, dtype=float).reshape(-1)
+        except:
+            raise ValueError('You need to input a numpy array or a list for your x vector')
+
+        if x.shape != (len(self.species),):
+            raise ValueError('The x vector must be the same height as your v matrices, but it was {}'.format(x.shape[0]))
+
+        temps, scalar = self._check_temps(T, t_err)
+        return x, temps, scalar
+
+    def _forward_coefs(self, T):
+        """ This function returns the forward reaction coefficients of every reaction at each
+        temperature in T, following Reaction.reaction_coef_forward. Overflow and underflow are
+        checked separately by _check_forward.
+        -------
+        Args: T; np array of length nT, temperatures
+        -------
+        Returns: np array nTxR, the forward coefficients
+        """
+        if np.any(self._constant & (self.ks == 0)):
+            print('warning. you are using a constant k with k=0')
+        if np.any(self._mod_arrh & (self.bs == 0)):
+            print('Warning: You are using modified arrhenius with b=0')
+
+        T = T.reshape(-1,1)
+        b = np.where(self._mod_arrh, self.bs, 0.)
+        return np.where(self._constant, self.ks, self.As*(T**b)*np.exp(-self.Es/(self.Rs*T)))
+
+    def _check_forward(self, kf, stop=None):
+        """ This function raises the error the first failing Arrhenius type coefficient would
+        have raised in Reaction._arrhenius or Reaction._mod_arrhenius.
+        -------
+        Args: kf; np array nTxR, the forward coefficients
+              stop; int, only reactions before this index are checked (all if None)
+        -------
+        Raises: OverflowError after constant evaluation
+                FloatingPointError after constant evaluation for underflow
+        """
+        kf = kf[:,:stop]
+        arrh = ~self._constant[:stop]
+        over = arrh & (kf == float('inf'))
+        under = arrh & (kf <= np.finfo(float).eps)
+        bad = np.flatnonzero(over | under)
+        if bad.size:
+            if over.flat[bad[0]]:
+                raise OverflowError('overflow error in evaluation of constant')
+            raise FloatingPointError('underflow error in evaluation of constant')
+
+    def _coefs(self, T):
+        """ This function returns the forward and backward coefficients of every reaction, from
+        the coefficient cache when it is enabled. Arrays of more temperatures than the cache holds
+        would only evict it, so they bypass it. Errors are raised in the same order as evaluating
+        the reactions one at a time would raise them.
+        -------
+        Args: T; np array of length nT, temperatures
+        -------
+        Returns: kf, kb; np arrays nTxR (kb is 0 for irreversible reactions)
+        """
+        if self._cache is None or len(T) > self._cache.maxsize:
+            return self._eval_coefs(T)
+
+        rows = [self._cache.get(t) for t in T]
+        missing = [i for i, row in enumerate(rows) if row is None]
+        if missing:
+            kf, kb = self._eval_coefs(T[missing])
+            for j, i in enumerate(missing):
+                rows[i] = (kf[j], kb[j])
+                self._cache.put(T[i], kf[j], kb[j])
+        return np.array([row[0] for row in rows]), np.array([row[1] for row in rows])
+
+    def _eval_coefs(self, T):
+        # evaluates the forward and backward coefficients (see _coefs), interpolating in the
+        # kinetics table for the temperatures it covers
+        if self.table is None:
+            return self._exact_coefs(T)
+        inside = self.table.covers(T)
+        if inside.all():
+            return self.table.coefs(T)
+        kf, kb = self._exact_coefs(T)
+        if inside.any():
+            kf[inside], kb[inside] = self.table.coefs(T[inside])
+        return kf, kb
+
+    def _exact_coefs(self, T):
+        # evaluates the forward and backward coefficients from the Arrhenius and NASA expressions
+        kf = self._forward_coefs(T)
+        first_rev = np.argmax(self.reversible) if self.number_reverse else None
+        self._check_forward(kf, None if first_rev is None else first_rev+1)
+        kb = self._backward_coefs(T, kf)
+        self._check_forward(kf)
+        return kf, kb
+
+    def tabulate(self, tmin, tmax, rtol=1e-6, max_points=2**16+1):
+        """ This function switches the set to tabulated kinetics: the forward and backward
+        coefficients are precomputed on a grid over [tmin, tmax] and later found by linear
+        interpolation of log k against 1/T, skipping the exp, log and polynomial evaluations.
+        The grid is refined until the interpolation error, checked against the exact
+        coefficients halfway between grid points, is below rtol. Temperatures outside the
+        range are still evaluated exactly. set_params rebuilds the table.
+        -------
+        Args: tmin, tmax; floats, the temperature range of the table
+              rtol; float, the relative error target of the interpolated coefficients
+              max_points; int, the largest grid allowed
+        -------
+        Returns: the KineticsTable, also stored as the table attribute
+        -------
+        Raises: ValueError if the range is invalid or rtol is not met with max_points points
+                (and the errors of the exact evaluation over the range)
+        """
+        self.table = None
+        self.table = KineticsTable(self, tmin, tmax, rtol, max_points)
+        # the cached coefficients came from the exact evaluation or from the previous table
+        if self._cache is not None:
+            self._cache.invalidate()
+        return self.table
+
+    def untabulate(self):
+        # goes back to evaluating every coefficient exactly
+        self.table = None
+        if self._cache is not None:
+            self._cache.invalidate()
+
+    def cache_info(self):
+        """ This function reports the statistics of the coefficient cache.
+        -------
+        Returns: CacheInfo(hits, misses, maxsize, currsize), all 0 when the cache is disabled
+        """
+        if self._cache is None:
+            return CacheInfo(0, 0, 0, 0)
+        return self._cache.info()
+
+    def cache_clear(self):
+        # empties the coefficient cache and resets its statistics
+        if self._cache is not None:
+            self._cache.clear()
+
+    def _backward_coefs(self, T, kf):
+        """ This function returns the backward reaction coefficients of every reaction at each
+        temperature in T, following ReversibleReaction.reaction_coef_backward.
+        -------
+        Args: T; np array of length nT, temperatures
+              kf; np array nTxR, the forward coefficients at T
+        -------
+        Returns: np array nTxR, the backward coefficients (0 for irreversible reactions)
+        """
+        kb = np.zeros(kf.shape)
+        if not self.number_reverse:
+            return kb
+        H_RT, S_R = self._thermo_properties(T)
+        T = T.reshape(-1,1)
+
+        rev = self.reversible
+        delta_G_over_RT = self.net.to_reactions(S_R - H_RT)[:,rev]
+        ke = (self.p0s[rev] / self.Rs[rev] / T)**self.gammas[rev] * np.exp(delta_G_over_RT)
+        kb[:,rev] = kf[:,rev] / ke
+        return kb
+
+    def _thermo_properties(self, T):
+        """ This function returns the dimensionless enthalpy and entropy of every species at each
+        temperature in T, from the NASA polynomials.
+        -------
+        Args: T; np array of length nT, temperatures
+        -------
+        Returns: H_RT, S_R; np arrays nTxS
+        """
+        return _nasa_properties(self.thermo.coefs(T), T)
+
+    def _coef_derivatives(self, T):
+        """ This function returns the analytic temperature derivatives of the forward and backward
+        coefficients. With k = A T**b exp(-E/RT), d ln kf / dT = b/T + E/(RT**2), and since
+        d(S/R - H/RT)/dT = (H/RT)/T for the NASA polynomials, d ln ke / dT = (sum_i nu_i H_i/RT - gamma)/T.
+        -------
+        Args: T; np array of length nT, temperatures
+        -------
+        Returns: kf, kb, dkf, dkb; np arrays nTxR (kb and dkb are 0 for irreversible reactions)
+        """
+        kf, kb = self._coefs(T)
+        T = T.reshape(-1,1)
+        b = np.where(self._mod_arrh, self.bs, 0.)
+        dlog_kf = np.where(self._constant, 0., b/T + self.Es/(self.Rs*T**2))
+        dkf = kf*dlog_kf
+        dkb = np.zeros(kb.shape)
+        if self.number_reverse:
+            rev = self.reversible
+            H_RT, _ = self._thermo_properties(T.reshape(-1))
+            dlog_ke = (self.net.to_reactions(H_RT)[:,rev] - self.gammas[rev]) / T
+            dkb[:,rev] = kb[:,rev]*(dlog_kf[:,rev] - dlog_ke)
+        return kf, kb, dkf, dkb
+
+    def _progress_rates(self, x, T, cached=True):
+        # progress rates (nTxR) of all reactions from the compiled mechanism arrays, with the
+        # coefficients evaluated without the cache if not cached
+        kf, kb = self._coefs(T) if cached else self._eval_coefs(T)
+        w = kf*self.reactants.products(x)
+        if self.number_reverse:
+            w = w - kb*self.products.products(x)
+        return w
 
     def reaction_rates(self,x,T):
-        # gets reaction rates from reaction classes
-        rates = np.zeros((1,len(self.species)))
-        for react in self.reactions:
-            rates += react.reaction_rate(x,T)
-        return rates[0]
+        # reaction rates of every species (length S, or nTxS for an array of temperatures)
+        x, temps, scalar = self._check_inputs(x, T, ValueError)
+        rates = self.net.to_species(self._progress_rates(x, temps))
+        return rates[0] if scalar else rates
 
     def progress_rates(self,x,T):
-        # gets progress rates from reaction classes
-        rates = []
-        for react in self.reactions:
-            rates.append(react.progress_rate(x,T))
-        return np.array(rates)
+        # progress rates of every reaction (length R, or nTxR for an array of temperatures)
+        x, temps, scalar = self._check_inputs(x, T)
+        rates = self._progress_rates(x, temps)
+        return rates[0] if scalar else rates
 
     def reaction_coefs(self,T):
-        # naive implementations for irreversible
-        coefs = []
-        for react in self.reactions:
-            coefs.append(react.reaction_coef(T))
-        return coefs
+        """ This function returns the reaction coefficients of every reaction.
+        -------
+        Args: T; float or 1-D array of floats, the strictly positive temperature(s)
+        -------
+        Returns: for a float T, list of (forward coef, backward coef) tuples with the backward
+                 coef None for irreversible reactions. For an array of temperatures, a tuple
+                 (kf, kb) of nTxR arrays with kb NaN for irreversible reactions.
+        -------
+        Raises: TypeError when T cannot be cast to a float, ValueError when T is negative
+        """
+        temps, scalar = self._check_temps(T, TypeError)
+        kf, kb = self._coefs(temps)
+        if not scalar:
+            kb[:,~self.reversible] = np.nan
+            return kf, kb
+        return [(kf[0,j], kb[0,j] if self.reversible[j] else None) for j in range(len(self.As))]
+
+    def reaction_coefs_dT(self,T):
+        """ This function returns the analytic temperature derivatives of the reaction coefficients.
+        -------
+        Args: T; float or 1-D array of floats, the strictly positive temperature(s)
+        -------
+        Returns: a tuple (dkf/dT, dkb/dT) of length R arrays, or of nTxR arrays for an array of
+                 temperatures, with dkb/dT 0 for irreversible reactions
+        -------
+        Raises: TypeError when T cannot be cast to a float, ValueError when T is negative
+        """
+        temps, scalar = self._check_temps(T, TypeError)
+        _, _, dkf, dkb = self._coef_derivatives(temps)
+        return (dkf[0], dkb[0]) if scalar else (dkf, dkb)
+
+    def reaction_rates_dT(self,x,T):
+        """ This function returns the analytic temperature derivative of the reaction rates.
+        -------
+        Args: x; vector, numpy array (or list) of length equal to the number of species
+              T; float or 1-D array of floats, the strictly positive temperature(s)
+        -------
+        Returns: np array of length S, or nTxS for an array of temperatures
+        -------
+        Raises: ValueError when x is not of length S or T is negative or not a float
+        """
+        x, temps, scalar = self._check_inputs(x, T, ValueError)
+        _, _, dkf, dkb = self._coef_derivatives(temps)
+        dw = dkf*self.reactants.products(x)
+        if self.number_reverse:
+            dw = dw - dkb*self.products.products(x)
+        rates = self.net.to_species(dw)
+        return rates[0] if scalar else rates
+
+    def _check_batch(self, x_in, T, chunk_size):
+        """ This function validates and converts the inputs of the batch rate methods.
+        -------
+        Args: x_in; np array NxS, one concentration vector per row
+              T; float or np array of length N, the temperature of each row
+              chunk_size; int or None, the number of rows evaluated at once
+        -------
+        Returns: x, np array NxS, temps, np array of length N, and chunk_size, int
+        -------
+        Raises: ValueError when x is not NxS, T is not a float or of length N, a temperature
+                is negative or chunk_size is not a positive integer
+        """
+        try:
+            x = np.asarray(x_in, dtype=float)
+        except:
+            raise ValueError('You need to input a numpy array or a list of lists for your x array')
+
+        if x.ndim != 2 or x.shape[1] != len(self.species):
+            raise ValueError('The x array must be of shape (N, {}), but it was {}'.format(len(self.species), x.shape))
+
+        temps, scalar = self._check_temps(T, ValueError)
+        if scalar:
+            temps = np.full(x.shape[0], temps[0])
+        if temps.shape != (x.shape[0],):
+            raise ValueError('You need one temperature for each of the {} rows of x, not {}'.format(x.shape[0], len(temps)))
+
+        return x, temps, self._chunk_size(chunk_size)
+
+    def _chunk_size(self, chunk_size):
+        # rows evaluated at once by the batch methods, by default about BATCH_BYTES of intermediates
+        if chunk_size is None:
+            chunk_size = max(1, BATCH_BYTES // (8 * (10 * len(self.species) + 4 * len(self.As))))
+        if int(chunk_size) != chunk_size or chunk_size < 1:
+            raise ValueError('Your chunk_size must be a positive integer, not {}'.format(chunk_size))
+        return int(chunk_size)
+
+    def _batch_progress(self, x, T):
+        # progress rates (NxR) for one concentration vector and temperature per row, whose
+        # temperatures seldom repeat, so the coefficient cache is not used
+        kf, kb = self._eval_coefs(T)
+        w = kf*self.reactants.products(x)
+        if self.number_reverse:
+            w -= kb*self.products.products(x)
+        return w
+
+    def _batch(self, x, T, chunk_size, width, evaluate):
+        # applies evaluate to successive row chunks of x and T, filling an N x width array
+        out = np.empty((x.shape[0], width))
+        for start in range(0, x.shape[0], chunk_size):
+            stop = start + chunk_size
+            out[start:stop] = evaluate(x[start:stop], T[start:stop])
+        return out
+
+    def reaction_rates_batch(self, x, T, chunk_size=None):
+        """ This function calculates the reaction rates for a batch of independent samples (for
+        example the cells of a simulation), each with its own concentrations and temperature.
+        The samples are evaluated chunk_size rows at a time to bound the peak memory.
+        -------
+        Args: x; np array NxS, one concentration vector per row
+              T; float or np array of length N, the temperature of each row
+              chunk_size; int, the number of rows evaluated at once (default chosen so each
+                          chunk uses about BATCH_BYTES of working memory)
+        -------
+        Returns: np array NxS, the reaction rate of every species for each row
+        -------
+        Raises: ValueError when x is not NxS, T is not a float or of length N, or a temperature
+                is negative (reaction classes may raise exceptions - see reaction_rates)
+        """
+        x, temps, chunk_size = self._check_batch(x, T, chunk_size)
+        return self._batch(x, temps, chunk_size, len(self.species),
+                           lambda xs, ts: self.net.to_species(self._batch_progress(xs, ts)))
+
+    def progress_rates_batch(self, x, T, chunk_size=None):
+        """ This function calculates the progress rates for a batch of independent samples, each
+        with its own concentrations and temperature. See reaction_rates_batch.
+        -------
+        Args: x; np array NxS, one concentration vector per row
+              T; float or np array of length N, the temperature of each row
+              chunk_size; int, the number of rows evaluated at once
+        -------
+        Returns: np array NxR, the progress rate of every reaction for each row
+        """
+        x, temps, chunk_size = self._check_batch(x, T, chunk_size)
+        return self._batch(x, temps, chunk_size, len(self.As), self._batch_progress)
+
+    def rates_hdf5(self, in_file, concs = 'concs', temps = 'T', out_file = None, rates = 'rates',
+                   progress = None, chunk_size = None, compression = 'gzip'):
+        """ This method calculates the reaction rates of the samples stored in an HDF5 file (for example
+        the cells of a simulation snapshot), reading the concentration and temperature datasets and writing
+        the rates chunk_size rows at a time, so files larger than memory are evaluated in bounded memory.
+        If the evaluation fails, the output datasets it created are deleted, and so is out_file if it
+        did not exist before.
+        -------
+        Args: in_file; str, the HDF5 file holding the samples
+              concs; str, the path in in_file of the NxS concentration dataset, one sample per row
+              temps; str, the path in in_file of the length N temperature dataset
+              out_file; str, the HDF5 file the results are written to (created if needed), or None
+                        to write them into in_file
+              rates; str, the path of the NxS float64 output dataset of the reaction rates
+              progress; str, if given the path of an NxR float64 output dataset of the progress rates
+              chunk_size; int, the number of rows read, evaluated and written at once (default as for
+                          reaction_rates_batch)
+              compression; str - the h5py compression filter of the output datasets, or None
+        -------
+        Returns: str, the name of the file the results were written to
+        -------
+        Raises: ValueError when the concentration dataset is not NxS, the temperature dataset is not of
+                length N, an output dataset already exists, a temperature is negative or chunk_size is
+                not a positive integer (reaction classes may raise exceptions - see reaction_rates)
+                KeyError if an input dataset is not in in_file
+                ImportError if h5py is not installed
+        """
+        h5py = _h5py()
+        if out_file is None or os.path.abspath(out_file) == os.path.abspath(in_file):
+            out_file = in_file
+        S, R = len(self.species), len(self.As)
+        chunk_size = self._chunk_size(chunk_size)
+
+        # out_file is removed on failure if this call created it
+        created = not os.path.exists(out_file)
+        try:
+            with ExitStack() as files:
+                source = files.enter_context(h5py.File(in_file, 'r+' if out_file == in_file else 'r'))
+                target = source if out_file == in_file else files.enter_context(h5py.File(out_file, 'a'))
+                x, T = source[concs], source[temps]
+                if x.ndim != 2 or x.shape[1] != S:
+                    raise ValueError('The {} dataset must be of shape (N, {}), but it was {}'.format(concs, S, x.shape))
+                N = x.shape[0]
+                if T.shape != (N,):
+                    raise ValueError('The {} dataset must hold one temperature for each of the {} rows of {}, '
+                                     'not {}'.format(temps, N, concs, T.shape))
+
+                # The output datasets, each with the function of the progress rates it holds
+                outputs = [(rates, S, self.net.to_species)]
+                if progress is not None:
+                    outputs.append((progress, R, lambda w: w))
+                datasets = []
+                try:
+                    for name, width, _ in outputs:
+                        if name in target:
+                            raise ValueError('The dataset {} already exists in {}. Hint: choose another name '
+                                             'or delete it first'.format(name, out_file))
+                        datasets.append(target.create_dataset(name, shape=(N, width), dtype='f8',
+                                                              chunks=(max(1, min(chunk_size, N)), max(width, 1)),
+                                                              compression=compression))
+                    datasets[0].attrs['species'] = np.array(self.species, dtype=object)
+
+                    # Read, evaluate and write one chunk of rows at a time
+                    for start in range(0, N, chunk_size):
+                        stop = min(start + chunk_size, N)
+                        x_chunk, T_chunk, _ = self._check_batch(x[start:stop], T[start:stop], chunk_size)
+                        w = self._batch_progress(x_chunk, T_chunk)
+                        for dataset, (_, _, evaluate) in zip(datasets, outputs):
+                            dataset[start:stop] = evaluate(w)
+                except BaseException:
+                    # partly written outputs would look complete and block a retry
+                    for dataset in datasets:
+                        del target[dataset.name]
+                    raise
+        except BaseException:
+            if created and os.path.exists(out_file):
+                os.remove(out_file)
+            raise
+        return out_file
+
+    def _jacobian(self, x, kf, kb):
+        # reaction rates (S) and their SxS jacobian from the coefficients of one temperature,
+        # summing nu_ij * d(progress rate j)/dx_k over the nonzero entry pairs of each reaction
+        S = len(self.species)
+        (net_f, react_f, flat_f), (net_b, react_b, flat_b) = self._jac_pairs
+        w = kf*self.reactants.products(x)
+        grad = kf[self.reactants.reactions]*self.reactants.product_gradient(x)
+        jac = np.bincount(flat_f, weights=self.net.values[net_f]*grad[react_f], minlength=S*S)
+        if self.number_reverse:
+            w = w - kb*self.products.products(x)
+            grad = kb[self.products.reactions]*self.products.product_gradient(x)
+            jac -= np.bincount(flat_b, weights=self.net.values[net_b]*grad[react_b], minlength=S*S)
+        return self.net.to_species(w), jac.reshape(S, S)
+
+    def jacobian(self, x, T, rates=False):
+        """ This function returns the analytic jacobian of the reaction rates with respect to the
+        concentrations, d f_i / d x_k, from the mass-action form of the progress rates.
+        -------
+        Args: x; vector, numpy array (or list) of length equal to the number of species
+              T; float, the strictly positive temperature
+              rates; boolean, if true the reaction rates of the same evaluation are also returned
+        -------
+        Returns: np array SxS, the jacobian, or a tuple (rates, jacobian) if rates is true
+        -------
+        Raises: ValueError when x is not of length S or T is not a single positive float
+        """
+        x, temps, scalar = self._check_inputs(x, T, ValueError)
+        if not scalar:
+            raise ValueError('Your temperature must be a single float, not of shape {}'.format(temps.shape))
+        kf, kb = self._coefs(temps)
+        f, jac = self._jacobian(x, kf[0], kb[0])
+        return (f, jac) if rates else jac
+
+    def _ode(self, T):
+        """ This function builds the right hand side dx/dt = f(t, x) of the isothermal species
+        equations at temperature T, and its jacobian. The coefficients are evaluated once, and the
+        returned functions do no validation or copying, so the ODE solver can call them cheaply.
+        -------
+        Args: T; float, the already validated temperature
+        -------
+        Returns: functions f(t, x), returning the length S reaction rates of the concentrations x,
+                 and jac(t, x), returning their SxS jacobian
+        """
+        kf, kb = self._coefs(np.array([T]))
+        kf, kb = kf[0], kb[0]
+        reactants, products, net = self.reactants, self.products, self.net
+        jac = lambda t, x: self._jacobian(x, kf, kb)[1]
+        if not self.number_reverse:
+            return lambda t, x: net.to_species(kf*reactants.products(x)), jac
+        def rhs(t, x):
+            return net.to_species(kf*reactants.products(x) - kb*products.products(x))
+        return rhs, jac
+
+    def integrate(self, x0, T, t_span, method='BDF', rtol=1e-6, atol=1e-12, dense_output=False, t_eval=None):
+        """ This function integrates the species concentrations in time at the constant temperature T,
+        with an implicit solver from scipy.integrate.solve_ivp and its adaptive step control. The
+        implicit methods are given the analytic jacobian instead of building it by finite differences.
+        -------
+        Args: x0; np array of length S, the initial concentration of each species
+              T; float, the strictly positive temperature
+              t_span; tuple (t0, tf), the interval of integration
+              method; str, the solve_ivp method, 'BDF' by default. 'Radau' and 'LSODA' are also
+                      suited to stiff mechanisms, the explicit methods are not.
+              rtol, atol; floats, the relative and absolute tolerances of the step control
+              dense_output; boolean, if true the result has a continuous solution sol(t)
+              t_eval; array of times at which to store the solution, defaults to the solver steps
+        -------
+        Returns: the solve_ivp result, with the times in t, the SxN concentrations in y, the
+                 continuous solution in sol when dense_output is true and the success flag in success
+        -------
+        Raises: ValueError when x0 is not of length S or contains negative values, when T is not
+                a single positive float or when t_span is not a pair of floats
+                ImportError if scipy is not installed
+        """
+        x, temps, scalar = self._check_inputs(x0, T, ValueError)
+        if not scalar:
+            raise ValueError('Your temperature must be a single float, not of shape {}'.format(temps.shape))
+        if np.any(x < 0):
+            raise ValueError('Your initial concentrations should be positive. Hint: x0 contained {}'.format(x[x < 0][0]))
+        try:
+            t0, tf = (float(t) for t in t_span)
+        except (TypeError, ValueError):
+            raise ValueError('Your t_span must be a pair of floats (t0, tf), not {}'.format(t_span))
+
+        solve_ivp = _solve_ivp()
+        rhs, jac = self._ode(temps[0])
+        options = {'jac': jac} if method in ('BDF', 'Radau', 'LSODA') else {}
+        return solve_ivp(rhs, (t0, tf), x, method=method, rtol=rtol, atol=atol,
+                         dense_output=dense_output, t_eval=t_eval, **options)
+
+    def _sweep_chunks(self, concs, temps, workers=None, executor=None, columns=None):
+        """ This generator evaluates the reaction rates over a temperature sweep, SWEEP_CHUNK
+        temperatures at a time. The mechanism is evaluated once per chunk for all the species
+        and only the queried columns are kept. When workers or executor is given the chunks are
+        evaluated in a process pool, with a bounded number in flight, and yielded in order. The
+        chunks are the same either way, so the parallel results are bit-identical to the serial ones.
+        temps is only read one chunk at a time, so it may be a memory mapped array.
+        -------
+        Args: concs; np array, concentration of ALL the species
+              temps; np array of length nT, temperatures
+              workers; int, the number of processes of a new ProcessPoolExecutor
+              executor; concurrent.futures.Executor to use instead of a new pool
+              columns; list of C species indexes to keep, defaults to all the species
+        -------
+        Yields: chunk, np array of the temperatures of the chunk, and rates, np array chunkxC of
+                their reaction rates
+        -------
+        Raises: ValueError if workers is not a positive integer
+                TypeError if invalid value is found in temperature array
+        """
+        if workers is not None and (int(workers) != workers or workers < 1):
+            raise ValueError('Your workers must be a positive integer, not {}'.format(workers))
+        if columns is None:
+            columns = list(range(len(self.species)))
+
+        def chunks():
+            for i in range(0, len(temps), SWEEP_CHUNK):
+                try:
+                    chunk = np.asarray(temps[i:i+SWEEP_CHUNK], dtype=float)
+                except (TypeError, ValueError):
+                    raise TypeError('Non numeric value found in temperature array')
+                yield chunk
+
+        if executor is None and (workers is None or workers == 1 or len(temps) <= SWEEP_CHUNK):
+            for chunk in chunks():
+                yield chunk, _sweep_chunk(self, concs, chunk, columns)
+            return
+
+        def tasks():
+            task = []
+            for chunk in chunks():
+                task.append(chunk)
+                if len(task) == SWEEP_TASK:
+                    yield task
+                    task = []
+            if task:
+                yield task
+
+        # Each task evaluates SWEEP_TASK chunks, so the set is pickled once per task
+        pool = executor or ProcessPoolExecutor(int(workers))
+        window = 2*(workers or os.cpu_count() or 1)
+        pending = deque()
+        try:
+            for task in tasks():
+                pending.append((task, pool.submit(_sweep_task, self, concs, task, columns)))
+                while len(pending) > window or (pending and pending[0][1].done()):
+                    done, future = pending.popleft()
+                    yield from zip(done, future.result())
+            while pending:
+                done, future = pending.popleft()
+                yield from zip(done, future.result())
+        finally:
+            for _, future in pending:
+                future.cancel()
+            if executor is None:
+                pool.shutdown()
+
+    def _sweep_rates(self, concs, temps, workers=None, executor=None, columns=None):
+        # reaction rates (nTxC) of a whole temperature sweep, assembled from _sweep_chunks
+        results = [rates for _, rates in self._sweep_chunks(concs, temps, workers, executor, columns)]
+        width = len(self.species) if columns is None else len(columns)
+        return np.vstack(results) if results else np.zeros((0, width))
 
     def __str__(self):
         return "species: {0}, with {1} Reversible reaction(s) and {2} Irreversible reaction(s)".format( \
-                         self.species, self.number_reverse, len(self.reactions)-self.number_reverse)
+                         self.species, self.number_reverse, len(self.As)-self.number_reverse)
 
     def get_params(self):
         return self.param_dict
@@ -212,6 +1147,9 @@ class ReactionSet:
             else:
                 raise ValueError('Your input for coeftype was {coeftype}, not an available option')
 
+        # Keep the compiled mechanism arrays in step with the reaction objects
+        self._compile()
+
 
     def get_reactions(self,name):
         """ This function takes in the name of the input xml file, and returns a dictionary of relevant information for
@@ -234,215 +1172,250 @@ class ReactionSet:
                  reaction_dict['vprime'] : np array, full vprime matrix of all reactions in the xml file
                  reaction_dict['v2prime'] : np array, full v2prime matrix of all reactions in the xml file
                  reaction_dict['reversible'] : List of True or False, indicating if the type of each reaction in order
+                 reaction_dict['reactants'], reaction_dict['products'] : Stoichiometry, sparse SxR matrices
+                                               of the reactant and product coefficients of all reactions
+        The file is read incrementally, and each reaction element is released once parsed.
         """
         if os.stat(name).st_size == 0:
             raise FileNotFoundError("File is empty.  Hint: Double-check xml file contents")
 
         reaction_dict = {'reactions':[]}
-        tree = ET.parse(name)
-        chemical_reactions = tree.getroot()
-        if chemical_reactions == []:
+        species_list, species_index = [], {}
+        reaction_data, found_reactions = None, False
+        entries = {'reactants': ([], [], []), 'products': ([], [], [])}
+
+        # Stream the file, parsing each reaction as soon as it is complete and releasing it
+        for event, ele in ET.iterparse(name, events=('start', 'end')):
+            if event == 'start':
+                if ele.tag == 'reactionData':
+                    reaction_data, found_reactions = ele, True
+                continue
+
+            if ele.tag == 'phase':
+                # Get the list and number of species
+                for e in ele.find('speciesArray').text.split():
+                    species_index.setdefault(e, len(species_list))
+                    species_list.append(e)
+
+            elif ele.tag == 'reaction' and reaction_data is not None:
+                if species_list == []:
+                    raise ValueError('Invalid species list in xml')
+                react = self._parse_reaction(ele, species_index, len(species_list))
+                j = len(reaction_dict['reactions'])
+                for tag, (species, reactions, values) in entries.items():
+                    species.extend(react[tag].keys())
+                    reactions.extend([j]*len(react[tag]))
+                    values.extend(react[tag].values())
+                reaction_dict['reactions'].append(react)
+                reaction_data.remove(ele)
+
+            elif ele.tag == 'reactionData':
+                reaction_data = None
+
+        if not found_reactions:
             raise ValueError('Unable to locate reaction data in xml')
-
-        # Get the list and number of species
-        species_list = []
-        for ele in chemical_reactions.iter('phase'):
-            for e in ele.find('speciesArray').text.split():
-                species_list.append(e)
         reaction_dict['species'] = np.array(species_list)
         if species_list == []:
             raise ValueError('Invalid species list in xml')
-
-        # Check if the reaction is reversible
-        valid_atrribs = set(['yes', 'no'])
-
         # Check for empty reactions
-        reactions_list = chemical_reactions.find('reactionData').findall('reaction')
-        if reactions_list == []:
+        if reaction_dict['reactions'] == []:
             raise ValueError('Invalid reactions list in xml')
 
-        for reaction_data in reactions_list:
-            react = {}
-            reversible_attrib = reaction_data.get('reversible')
-            type_attrib = reaction_data.get('type')
-
-            # Check if there exists a tag for reversible and type
-            if reversible_attrib == None:
-                raise ValueError('Unspecified reversible type: missing reversible tag. Hint: check if you include a \
-                                reversible tag for every reaction.')
-            if type_attrib == None:
-                raise ValueError('Unspecified Elementary type: missing type tag. Hint: check if you include a tag type \
-                                indicating if the reaction is elementary or not.')
-
-            # Check if the reversible tag is yes or no
-            if reversible_attrib.lower() not in valid_atrribs:
-                raise ValueError('Attributes of reversible tag invalid. Hint: check the content of the reversible tag.\
-                                 Must be "yes" or "no".')
-
-            # Append the list indicating reversible reactions or not
-            if reversible_attrib.lower() == 'yes':
-                react['reversible'] = True
-            else:
-                react['reversible'] = False
-
-            # Check the type tag, only support Elementary type at this point
-            if type_attrib != 'Elementary':
-                raise NotImplementedError('Module can only support elementary reaction at this point. Hint: input type \
-                                        for reactions maybe invalid.')
-
-            valid_rc = ['Arrhenius','modifiedArrhenius','Constant']
-
-            for coeff_set in reaction_data.find('rateCoeff'):
-                if coeff_set.tag not in valid_rc:
-                    raise ValueError('There is no valid tag called'.format(coeff_set.tag))
-                react['coeftype'] = coeff_set.tag
-
-                if coeff_set.tag == 'Arrhenius':
-                    # Check if received unwanted value for a Arrhenius reaction coefficient
-                    b = coeff_set.find('b')
-                    k = coeff_set.find('k')
-                    if b != None:
-                        print('warning: received a b value for Arrhenius reaction rate coefficient. Replace with 0.')
-                    if k != None:
-                        print('warning: received a k value for Arrhenius reaction rate coefficient. Replace with 0.')
-                    react['b'] = 0
-                    react['k'] = 0
-
-                    react['A'] = float(coeff_set.find('A').text)
-                    react['E'] = float(coeff_set.find('E').text)
-
-                elif coeff_set.tag == 'modifiedArrhenius':
-                    # Check if received unwanted value for a modified Arrhenius reaction coefficient
-                    k = coeff_set.find('k')
-                    if k != None:
-                        print('warning: received a k value for modified Arrhenius reaction rate coefficient. Replace with 0.')
-                    react['k'] = 0
-
-                    react['A'] = float(coeff_set.find('A').text)
-                    react['b'] = float(coeff_set.find('b').text)
-                    react['E'] = float(coeff_set.find('E').text)
-                elif coeff_set.tag == 'Constant':
-                    # Check if received unwanted value for a constant reaction coefficient
-                    A = coeff_set.find('A')
-                    b = coeff_set.find('b')
-                    E = coeff_set.find('E')
-                    if A != None:
-                        print('warning: received a A value for a constant reaction rate coefficient. Replace with 0.')
-                    if b != None:
-                        print('warning: received a b value for constant reaction rate coefficient. Replace with 0.')
-                    if E != None:
-                        print('warning: recieved a E value for constant reaction rate coefficient. Replace with 0.')
-                    react['A'] = 0
-                    react['b'] = 0
-                    react['E'] = 0
-
-                    react['k'] = float(coeff_set.find('k').text)
-
-
-            # Get the reactants for the 'vprime' matrix and arrange the vprime matrix
-            vprime = np.zeros((len(species_list),1))
-
-
-            # Find the reactants data
-            reactants_text = reaction_data.find('reactants').text
-
-            # Split the data
-            for specie_concentration in reactants_text.split(' '):
-
-                # Get the name of the specie and its concentration
-                specie = specie_concentration.split(':')[0]
-                concentration = float(specie_concentration.split(':')[1])
-                vprime[species_list.index(specie)] = concentration # Update at the index
-
-
-            react['vprime'] = np.array(vprime)
-
-            # Get the reactants for the 'vprime' matrix and arrange the vprime matrix
-            v2prime = np.zeros((len(species_list),1))
-
-
-            # Find the reactants data
-            products_text = reaction_data.find('products').text
-
-            # Split the data
-            for specie_concentration in products_text.split(' '):
-
-                # Get the name of the specie and its concentration
-                specie = specie_concentration.split(':')[0]
-                concentration = float(specie_concentration.split(':')[1])
-                v2prime[species_list.index(specie)] = concentration  # Update at the index
-
-
+        # The sparse stoichiometric matrices of the whole mechanism
+        shape = (len(species_list), len(reaction_dict['reactions']))
+        for tag, (species, reactions, values) in entries.items():
+            reaction_dict[tag] = Stoichiometry(species, reactions, values, shape)
+        return reaction_dict
 
-            react['v2prime'] = np.array(v2prime)
-            reaction_dict['reactions'].append(react)
+    def _parse_species(self, text, species_index):
+        """ This function parses the reactants or products of a reaction, as in 'H:1 O2:1'.
+        --------
+        Args: text; str, the specie:coefficient pairs
+              species_index; dict, the index of each specie name
+        --------
+        Returns: dict of the coefficient of each specie index
+        --------
+        Raises: ValueError if a specie is not in the species list
+        """
+        entries = {}
+        for specie_concentration in text.split():
+            # Get the name of the specie and its concentration
+            specie, concentration = specie_concentration.split(':')
+            if specie not in species_index:
+                raise ValueError('Specie {} is not the species from your input file. Hint: check the speciesArray'.format(specie))
+            entries[species_index[specie]] = float(concentration)
+        return entries
+
+    def _parse_reaction(self, reaction_data, species_index, n_species):
+        """ This function parses one reaction element of the xml file.
+        --------
+        Args: reaction_data; the reaction Element
+              species_index; dict, the index of each specie name
+              n_species; int, the number of species
+        --------
+        Returns: react, dictionary of data for the reaction, with the keys reversible, coeftype, A,
+                 b, E, k, vprime and v2prime described in get_reactions, and reactants and products,
+                 dicts of the coefficient of each specie index (see ReactionDict)
+        """
+        # Check if the reaction is reversible
+        valid_atrribs = set(['yes', 'no'])
 
-        return reaction_dict
+        react = {}
+        reversible_attrib = reaction_data.get('reversible')
+        type_attrib = reaction_data.get('type')
+
+        # Check if there exists a tag for reversible and type
+        if reversible_attrib == None:
+            raise ValueError('Unspecified reversible type: missing reversible tag. Hint: check if you include a \
+                            reversible tag for every reaction.')
+        if type_attrib == None:
+            raise ValueError('Unspecified Elementary type: missing type tag. Hint: check if you include a tag type \
+                            indicating if the reaction is elementary or not.')
+
+        # Check if the reversible tag is yes or no
+        if reversible_attrib.lower() not in valid_atrribs:
+            raise ValueError('Attributes of reversible tag invalid. Hint: check the content of the reversible tag.\
+                             Must be "yes" or "no".')
+
+        # Append the list indicating reversible reactions or not
+        if reversible_attrib.lower() == 'yes':
+            react['reversible'] = True
+        else:
+            react['reversible'] = False
+
+        # Check the type tag, only support Elementary type at this point
+        if type_attrib != 'Elementary':
+            raise NotImplementedError('Module can only support elementary reaction at this point. Hint: input type \
+                                    for reactions maybe invalid.')
+
+        valid_rc = ['Arrhenius','modifiedArrhenius','Constant']
+
+        for coeff_set in reaction_data.find('rateCoeff'):
+            if coeff_set.tag not in valid_rc:
+                raise ValueError('There is no valid tag called'.format(coeff_set.tag))
+            react['coeftype'] = coeff_set.tag
+
+            if coeff_set.tag == 'Arrhenius':
+                # Check if received unwanted value for a Arrhenius reaction coefficient
+                b = coeff_set.find('b')
+                k = coeff_set.find('k')
+                if b != None:
+                    print('warning: received a b value for Arrhenius reaction rate coefficient. Replace with 0.')
+                if k != None:
+                    print('warning: received a k value for Arrhenius reaction rate coefficient. Replace with 0.')
+                react['b'] = 0
+                react['k'] = 0
+
+                react['A'] = float(coeff_set.find('A').text)
+                react['E'] = float(coeff_set.find('E').text)
+
+            elif coeff_set.tag == 'modifiedArrhenius':
+                # Check if received unwanted value for a modified Arrhenius reaction coefficient
+                k = coeff_set.find('k')
+                if k != None:
+                    print('warning: received a k value for modified Arrhenius reaction rate coefficient. Replace with 0.')
+                react['k'] = 0
+
+                react['A'] = float(coeff_set.find('A').text)
+                react['b'] = float(coeff_set.find('b').text)
+                react['E'] = float(coeff_set.find('E').text)
+            elif coeff_set.tag == 'Constant':
+                # Check if received unwanted value for a constant reaction coefficient
+                A = coeff_set.find('A')
+                b = coeff_set.find('b')
+                E = coeff_set.find('E')
+                if A != None:
+                    print('warning: received a A value for a constant reaction rate coefficient. Replace with 0.')
+                if b != None:
+                    print('warning: received a b value for constant reaction rate coefficient. Replace with 0.')
+                if E != None:
+                    print('warning: recieved a E value for constant reaction rate coefficient. Replace with 0.')
+                react['A'] = 0
+                react['b'] = 0
+                react['E'] = 0
+
+                react['k'] = float(coeff_set.find('k').text)
+
+        # Get the reactants of the 'vprime' vector and the products of the 'v2prime' vector
+        for tag in ('reactants', 'products'):
+            react[tag] = self._parse_species(reaction_data.find(tag).text, species_index)
+        return ReactionDict(n_species, react)
 
 #======================================================================================================================#
 # Graphic and tables
-    def plot_rates_against_temperature(self, query_species, concs, temps):
-        """This method plots the progress of the reaction rates for user-specified species over a temperature range
+    def _check_species(self, query_species):
+        """This method validates the query species of a temperature sweep.
         --------
         Args:   query_species, str or list of species which are being queried (str)
-                concs, np.array, concentration of ALL the species
-                temps, list or np array - all temperatures that will be queried
         --------
-        Returns: plot of reaction rates against the temperature for each query specie
+        Returns: species_list, list of the query species; specie_indexes, list of their indexes in the species
         --------
         Raises: TypeError if query_species is not a list of strings
                 ValueError if query_species contains an invalid specie
-                TypeError if invalid value is found in temperature array
         """
         # Error checking: check if the user passes in a correct type of input for query_species
         if not hasattr(query_species, "__len__"):
             raise TypeError('query_species must be a string of specie or a list of string of specie.')
 
-        if not isinstance(query_species, str):
-            for specie_name in query_species:
-                if not isinstance(specie_name, str):
-                    raise TypeError('The list of query_species contains invalid data type.')
-                if specie_name not in self.species:
-                    raise ValueError('Specie {} is not the species from your input file'.format(specie_name))
-        else:
-            if query_species not in self.species:
-                raise ValueError('Specie {} is not the species from your input file'.format(query_species))
+        species_list = [query_species] if isinstance(query_species, str) else list(query_species)
+        for specie_name in species_list:
+            if not isinstance(specie_name, str):
+                raise TypeError('The list of query_species contains invalid data type.')
+            if specie_name not in self.species:
+                raise ValueError('Specie {} is not the species from your input file'.format(specie_name))
+        specie_indexes = [list(self.species).index(specie) for specie in species_list]
+        return species_list, specie_indexes
+
+    def _check_sweep(self, query_species, temps, t_msg='Non numeric value found in temperature array'):
+        """This method validates the query species and temperatures of a temperature sweep, for
+        plot_rates_against_temperature, to_table and find_rates.
+        --------
+        Args:   query_species, str or list of species which are being queried (str)
+                temps, list or np array - all temperatures that will be queried
+                t_msg, str - message of the TypeError raised for a non numeric temperature
+        --------
+        Returns: species_list, list of the query species; specie_indexes, list of their indexes in
+                 the species; temps, np array of the temperatures as given; float_temps, np array of
+                 the temperatures as floats
+        --------
+        Raises: TypeError if query_species is not a list of strings
+                ValueError if query_species contains an invalid specie
+                TypeError if invalid value is found in temperature array
+        """
+        species_list, specie_indexes = self._check_species(query_species)
 
         # Error checking: check if the user passes in reasonable temperature inputs
         temps = np.array(temps,ndmin=1)
-        for i in range(len(temps)):
-            try:
-                temps[i] = float(temps[i])
-            except:
-                raise TypeError('Non numeric value found in temperature array')
-
-        # Plot the query specie, either a string or a list
-        if isinstance(query_species, str):
-            # the index of the specie
-            specie_index = list(self.species).index(query_species)
-
-            # reaction rates for the specie at each temperature
-            specie_reaction_rate = []
-
-            # calculate the reaction rate for each temperature
-            for t in temps:
-                specie_reaction_rate.append(self.reaction_rates(concs, t)[specie_index])
-
-            # make the plot
-            plt.plot(temps, specie_reaction_rate, label=query_species)
-        else:
-            # the indexes of each query specie
-            specie_indexes = [list(self.species).index(specie) for specie in query_species]
+        try:
+            float_temps = temps.astype(float)
+        except (TypeError, ValueError):
+            raise TypeError(t_msg)
+        return species_list, specie_indexes, temps, float_temps
 
-            species_reaction_rates = np.zeros((len(temps), len(query_species)))
+    def plot_rates_against_temperature(self, query_species, concs, temps, workers = None, executor = None):
+        """This method plots the progress of the reaction rates for user-specified species over a temperature range
+        --------
+        Args:   query_species, str or list of species which are being queried (str)
+                concs, np.array, concentration of ALL the species
+                temps, list or np array - all temperatures that will be queried
+                workers, int - if given, the temperatures are evaluated in chunks by a pool of this many processes
+                executor, concurrent.futures.Executor - evaluates the chunks instead of a new process pool
+        --------
+        Returns: plot of reaction rates against the temperature for each query specie
+        --------
+        Raises: TypeError if query_species is not a list of strings
+                ValueError if query_species contains an invalid specie
+                TypeError if invalid value is found in temperature array
+        """
+        species_list, specie_indexes, temps, float_temps = self._check_sweep(query_species, temps)
 
-            for t_index, t in enumerate(temps):
-                for reaction_index, specie_index in enumerate(specie_indexes):
-                    species_reaction_rates[t_index][reaction_index] = self.reaction_rates(concs, t) \
-                        [specie_index]
+        # reaction rates for each query specie at each temperature
+        species_reaction_rates = self._sweep_rates(concs, float_temps, workers, executor, specie_indexes)
 
-            for index, specie in enumerate(query_species):
-                plt.plot(temps, species_reaction_rates[:, index], label=specie)
+        # make the plot
+        plt = _pyplot()
+        for index, specie in enumerate(species_list):
+            plt.plot(temps, species_reaction_rates[:, index], label=specie)
 
         plt.xlabel("Temperature (K)")
         plt.ylabel("Reaction rate")
@@ -450,7 +1423,8 @@ class ReactionSet:
         plt.legend()
         plt.show()
 
-    def to_table(self, query_species, concs, temps, out_file, out_type = 'csv', save_output = True):
+    def to_table(self, query_species, concs, temps, out_file, out_type = 'csv', save_output = True,
+                 workers = None, executor = None):
         """This method outputs the reaction data to a table
         --------
         Args:   query_species, list of species which are being queried (str)
@@ -459,66 +1433,170 @@ class ReactionSet:
                 out_file, filename of table to output to
                 out_type, one of ['csv', 'txt', 'latex', 'hdf5']
                 save_output, boolean - if true, saves table, if false, simply returns output table
+                workers, int - if given, the temperatures are evaluated in chunks by a pool of this many processes
+                executor, concurrent.futures.Executor - evaluates the chunks instead of a new process pool
         --------
-        Returns: formatted output table
+        Returns: RateTable, the output table (np.asarray gives the labelled object table)
         --------
         Raises: TypeError if query_species is not a list of strings
                 ValueError if query_species contains an invalid specie
                 TypeError if invalid value is found in temperature array
         """
-        # Error checking: check if the user passes in a correct type of input for query_species
-        if not hasattr(query_species, "__len__"):
-            raise TypeError('query_species must be a string of specie or a list of string of specie.')
-
-        if not isinstance(query_species, str):
-            for specie_name in query_species:
-                if not isinstance(specie_name, str):
-                    raise TypeError('The list of query_species contains invalid data type.')
-                if specie_name not in self.species:
-                    raise ValueError('Specie {} is not the species from your input file'.format(specie_name))
-        else:
-            if query_species not in self.species:
-                raise ValueError('Specie {} is not the species from your input file'.format(query_species))
-
-        # Error checking: check if the user passes in reasonable temperature inputs
-        temps = np.array(temps,ndmin=1)
-        for i in range(len(temps)):
-            try:
-                temps[i] = float(temps[i])
-            except:
-                raise TypeError('Non numeric value found in temperature array')
-
-        # Get index of each specie in query_species
-        if isinstance(query_species, str):
-            query_species = [query_species]
-        specie_indexes = [list(self.species).index(specie) for specie in list(query_species)]
+        query_species, specie_indexes, temps, float_temps = self._check_sweep(query_species, temps)
 
         # Get full set of reaction rates at each temperature
-        species_reaction_rates = np.zeros((len(temps), len(query_species)))
-        for t_index, t in enumerate(temps):
-            for reaction_index, specie_index in enumerate(specie_indexes):
-                species_reaction_rates[t_index][reaction_index] = self.reaction_rates(concs, t) \
-                    [specie_index]
-
-        # Generate reaction rate table to be output as np array
-        out_table = np.zeros((len(temps)+1, len(query_species)+1), dtype = object)
-        # First row of output table = species labels
-        out_table[0, 1:] = query_species
-        # First column of output table = temperatures
-        out_table[1:, 0] = temps.T
-        # Bottom right of output table = reaction rates
-        out_table[1:, 1:] = species_reaction_rates
-        # Label temperature column
-        out_table[0, 0] = 'T'
-
-        # Write output array to chosen output format
-        if save_output:
-            _table_output(out_table, query_species, out_file, out_type)
+        # Reaction rate table, with the species as column labels, filled as the sweep chunks finish
+        out_table = RateTable(float_temps, np.empty((len(float_temps), len(specie_indexes))), query_species,
+                              int_temps=temps.dtype.kind in 'iu')
+        sweep = self._sweep_chunks(concs, float_temps, workers, executor, specie_indexes)
+        if not save_output:
+            self._fill_table(out_table, sweep)
+            return out_table
+
+        # Write output table to chosen output format on a background writer, which writes the rows
+        # already computed while the next chunks are evaluated
+        _check_table_output(out_file, out_type)
+        ready = queue.Queue()
+        writer = _TableWriter()
+        writer.submit(_table_output, out_table, query_species, out_file, out_type, _rows_ready(ready))
+        try:
+            self._fill_table(out_table, sweep, ready, writer)
+        except BaseException as err:
+            # Abort the write and remove the partly written table
+            ready.put(err)
+            writer.close(reraise=False)
+            filename = out_file + TABLE_EXTENSIONS[out_type]
+            if os.path.exists(filename):
+                os.remove(filename)
+            raise
+        ready.put(None)
+        writer.close()
 
         # Table has been outputted.  Return table used in its construction
         return out_table
 
-    def find_rates(self, query_species, concs, T_range, rtype):
+    def _fill_table(self, out_table, sweep, ready=None, writer=None):
+        # fills the rates of out_table from the sweep chunks, putting the number of rows filled on
+        # the ready queue after each chunk, and stopping early if the writer has failed
+        start = 0
+        for chunk, rates in sweep:
+            out_table.rates[start:start+len(chunk)] = rates
+            start += len(chunk)
+            if ready is not None:
+                ready.put(start)
+            if writer is not None and writer.error is not None:
+                return
+
+    def to_hdf5(self, query_species, concs, temps, out_file, compression = 'gzip', workers = None, executor = None):
+        """This method streams the reaction rates of a temperature sweep to an HDF5 file as the chunks are
+        computed, so sweeps larger than memory go straight to disk. The file holds a chunked, compressed
+        float64 dataset 'rates' (temperatures x species), with the 'T' and 'species' datasets attached as
+        its dimension scales.
+        --------
+        Args:   query_species, str or list of species which are being queried (str)
+                concs, np.array, concentration of ALL the species
+                temps, list or np array (it may be memory mapped) - all temperatures that will be queried
+                out_file, filename to output to, without the .hdf5 extension
+                compression, str - the h5py compression filter, or None
+                workers, int - if given, the temperatures are evaluated in chunks by a pool of this many processes
+                executor, concurrent.futures.Executor - evaluates the chunks instead of a new process pool
+        --------
+        Returns: str, the name of the written file
+        --------
+        Raises: TypeError if query_species is not a list of strings
+                ValueError if query_species contains an invalid specie
+                TypeError if invalid value is found in temperature array
+                ImportError if h5py is not installed
+        """
+        species_list, specie_indexes = self._check_species(query_species)
+        if not hasattr(temps, 'shape'):
+            temps = np.array(temps, ndmin=1)
+        temps = temps.reshape(-1)
+        h5py = _h5py()
+
+        filename = out_file + '.hdf5'
+        n, width = len(temps), len(species_list)
+        # Rows per HDF5 chunk and per write, a whole number of sweep chunks of about HDF5_BLOCK bytes
+        block = SWEEP_CHUNK*max(1, HDF5_BLOCK // (8*SWEEP_CHUNK*max(width, 1)))
+        try:
+            with h5py.File(filename, 'w') as root:
+                T = root.create_dataset('T', shape=(n,), maxshape=(None,), dtype='f8',
+                                        chunks=(block,), compression=compression)
+                species = root.create_dataset('species', data=np.array(species_list, dtype=object),
+                                              dtype=h5py.string_dtype())
+                rates = root.create_dataset('rates', shape=(n, width), maxshape=(None, width), dtype='f8',
+                                            chunks=(block, max(width, 1)), compression=compression)
+                T.make_scale('T')
+                species.make_scale('species')
+                rates.dims[0].attach_scale(T)
+                rates.dims[1].attach_scale(species)
+                rates.attrs['concs'] = np.asarray(concs, dtype=float).reshape(-1)
+
+                # Buffer the computed chunks and write them a block at a time
+                start, buffered = 0, []
+                sweep = self._sweep_chunks(concs, temps, workers, executor, specie_indexes)
+                for i, (chunk, chunk_rates) in enumerate(sweep, 1):
+                    buffered.append((chunk, chunk_rates))
+                    if i*SWEEP_CHUNK % block == 0 or i*SWEEP_CHUNK >= n:
+                        stop = start + sum(len(c) for c, _ in buffered)
+                        T[start:stop] = np.concatenate([c for c, _ in buffered])
+                        rates[start:stop] = np.vstack([r for _, r in buffered])
+                        start, buffered = stop, []
+        except BaseException:
+            # a partial file would look like a complete sweep
+            if os.path.exists(filename):
+                os.remove(filename)
+            raise
+        print("Output {} to file: {}".format(species_list, filename))
+        return filename
+
+    def to_npy(self, query_species, concs, temps, out_file, workers = None, executor = None):
+        """This method streams the reaction rates of a temperature sweep to a .npy file as the chunks are
+        computed. The file is preallocated and filled through a memory map, so the sweep is never held in
+        memory, and np.load(filename, mmap_mode='r') opens the result without copying it. The array is
+        float64 of shape (nT, C+1), laid out as the output table of to_table: the temperatures in the first
+        column and the reaction rates of the queried species in the others.
+        --------
+        Args:   query_species, str or list of species which are being queried (str)
+                concs, np.array, concentration of ALL the species
+                temps, list or np array (it may be memory mapped) - all temperatures that will be queried
+                out_file, filename to output to, without the .npy extension
+                workers, int - if given, the temperatures are evaluated in chunks by a pool of this many processes
+                executor, concurrent.futures.Executor - evaluates the chunks instead of a new process pool
+        --------
+        Returns: str, the name of the written file
+        --------
+        Raises: TypeError if query_species is not a list of strings
+                ValueError if query_species contains an invalid specie
+                TypeError if invalid value is found in temperature array
+        """
+        species_list, specie_indexes = self._check_species(query_species)
+        if not hasattr(temps, 'shape'):
+            temps = np.array(temps, ndmin=1)
+        temps = temps.reshape(-1)
+
+        filename = out_file + '.npy'
+        out = np.lib.format.open_memmap(filename, mode='w+', dtype='f8',
+                                        shape=(len(temps), len(species_list) + 1))
+        try:
+            start = 0
+            for chunk, chunk_rates in self._sweep_chunks(concs, temps, workers, executor, specie_indexes):
+                stop = start + len(chunk)
+                out[start:stop, 0] = chunk
+                out[start:stop, 1:] = chunk_rates
+                start = stop
+            out.flush()
+        except BaseException:
+            # Do not leave a partly filled array that would load as a complete one
+            del out
+            os.remove(filename)
+            raise
+        del out
+        print("Output {} to file: {}".format(species_list, filename))
+        return filename
+
+    def find_rates(self, query_species, concs, T_range, rtype, workers = None, executor = None,
+                   refine = False, xtol = 1e-6):
         """
         This function finds the minimum reaction rate for the query specie in order passed in given the temperature range
         --------
@@ -526,31 +1604,19 @@ class ReactionSet:
         concs: np.array, concentration of ALL the species
         T_range: list of temperatures
         type: min or max, string indicating the type of rate the user wants to find
+        workers: int, if given the temperatures are evaluated in chunks by a pool of this many processes
+        executor: concurrent.futures.Executor, evaluates the chunks instead of a new process pool
+        refine: boolean, if true T_range is a coarse scan, and the best point of each specie is refined by a
+                golden-section search between its neighbours in T_range, down to xtol
+        xtol: float, the temperature tolerance in K of the refined search
         :return: tuple or list of tuples, minimum reaction rate for the query specie in the temperature range:
                  tuple form: (min/max rate, temperature when the rate occurs)
         """
-        # check if the user passes in a correct type of input for query_species
-        if not hasattr(query_species, "__len__"):
-            raise TypeError('query_species must be a string of specie or a list of string of specie.')
-
-        if not isinstance(query_species, str):
-            for specie_name in query_species:
-                if not isinstance(specie_name, str):
-                    raise TypeError('The list of query_species contains invalid data type.')
-                if specie_name not in self.species:
-                    raise ValueError('Specie {} is not the species from your input file'.format(specie_name))
-        else:
-            if query_species not in self.species:
-                raise ValueError('Specie {} is not the species from your input file'.format(query_species))
-
+        species_list, specie_indexes, _, temps = self._check_sweep(query_species, T_range,
+                                                                   'Invalid type in temperature range.')
         # check if the user passes in a correct type of input for the temperature bounds
-        if not hasattr(query_species, "__len__") or isinstance(T_range, str):
+        if isinstance(T_range, str):
             raise TypeError('T_range must be a list or array of possible temperatures')
-        for index, T in enumerate(T_range):
-            try:
-                float(T)
-            except:
-                raise TypeError('Invalid type in temperature range.')
 
         # check for type
         #### TODO do we really want to Return None instead of forcing the user to specify?
@@ -561,42 +1627,80 @@ class ReactionSet:
             raise ValueError('Invalid type. Hint: valid inputs for type include min and max')
 
 
-        # Plot the query specie, either a string or a list
-        if isinstance(query_species, str):
-            # the index of the specie
-            specie_index = list(self.species).index(query_species)
+        if refine and not xtol > 0:
+            raise ValueError('Your xtol must be a positive float, not {}'.format(xtol))
 
-            # reaction rates for the specie at each temperature
-            specie_reaction_rate = []
+        # reaction rates for each query specie at each temperature
+        species_reaction_rates = self._sweep_rates(concs, temps, workers, executor, specie_indexes)
 
-            # calculate the reaction rate for each temperature
-            for t in T_range:
-                specie_reaction_rate.append(self.reaction_rates(concs, t)[specie_index])
-
-            if rtype.lower() == 'min':
-                return np.min(specie_reaction_rate), T_range[np.argmin(specie_reaction_rate)]
-            else:
-                return np.max(specie_reaction_rate), T_range[np.argmax(specie_reaction_rate)]
+        # find the required rates for each query specie and the temperature
+        sign = 1. if rtype.lower() == 'min' else -1.
+        best = np.argmin(sign*species_reaction_rates, axis=0)
+        if refine:
+            rates = self._refine_extremum(concs, temps, best, specie_indexes, sign, xtol)
         else:
-            # the indexes of each query specie
-            specie_indexes = [list(self.species).index(specie) for specie in query_species]
-
-            species_reaction_rates = np.zeros((len(T_range), len(query_species)))
-
-            for t_index, t in enumerate(T_range):
-                for reaction_index, specie_index in enumerate(specie_indexes):
-                    species_reaction_rates[t_index][reaction_index] = self.reaction_rates(concs, t) \
-                        [specie_index]
-
-            rates = []
-            # find the required rates for each query specie and the temperature
-            if rtype.lower() == 'min':
-                for index in range(len(query_species)):
-                    rates.append((np.min(species_reaction_rates[:, index]), T_range[np.argmin(species_reaction_rates[:, index])]))
-            else:
-                for index in range(len(query_species)):
-                    rates.append((np.max(species_reaction_rates[:, index]), T_range[np.argmax(species_reaction_rates[:, index])]))
-            return rates
+            rates = [(species_reaction_rates[best[index], index], T_range[best[index]])
+                     for index in range(len(species_list))]
+        return rates[0] if isinstance(query_species, str) else rates
+
+    def _refine_extremum(self, concs, temps, best, specie_indexes, sign, xtol):
+        """ This function refines the extrema found on a temperature grid by golden-section search.
+        Each specie's search is bracketed by the grid neighbours of its best grid point, so it
+        stays inside the range already evaluated (and so inside the NASA validity range). The
+        searches of all the species advance together, one mechanism evaluation per step.
+        --------
+        Args:   concs, np.array, concentration of ALL the species
+                temps, np array of length nT, the grid temperatures
+                best, np array, the index in temps of the best grid point of each specie
+                specie_indexes, list of the index of each query specie
+                sign, 1. to find the minimum or -1. to find the maximum
+                xtol, float, the width in K the brackets are narrowed down to
+        --------
+        Returns: list of tuples (min/max rate, temperature when the rate occurs)
+        """
+        cols = np.arange(len(specie_indexes))
+
+        def objective(ts):
+            # sign times the rate of each specie at its own temperature
+            return sign*self.reaction_rates(concs, ts)[cols, specie_indexes]
+
+        # Bracket each specie's best grid point with its neighbours
+        order = np.argsort(temps)
+        rank = np.argsort(order)[best]
+        sorted_temps = temps[order]
+        a = sorted_temps[np.maximum(rank - 1, 0)]
+        b = sorted_temps[np.minimum(rank + 1, len(temps) - 1)]
+
+        g = (np.sqrt(5.) - 1.) / 2.
+        c, d = b - g*(b - a), a + g*(b - a)
+        fc, fd = objective(c), objective(d)
+        while np.max(b - a) > xtol:
+            left = fc < fd
+            # keep [a, d] when f(c) < f(d), else [c, b], and reuse the inner point that stays inside
+            b, a = np.where(left, d, b), np.where(left, a, c)
+            keep, fkeep = np.where(left, c, d), np.where(left, fc, fd)
+            new = np.where(left, b - g*(b - a), a + g*(b - a))
+            fnew = objective(new)
+            c, fc = np.where(left, new, keep), np.where(left, fnew, fkeep)
+            d, fd = np.where(left, keep, new), np.where(left, fkeep, fnew)
+
+        # The grid point wins when the extremum is at the end of the range
+        grid = temps[best]
+        fgrid = objective(grid)
+        ts = np.where(fc <= fd, c, d)
+        fs = np.minimum(fc, fd)
+        ts, fs = np.where(fgrid < fs, grid, ts), np.minimum(fgrid, fs)
+        return [(sign*fs[index], ts[index]) for index in cols]
+
+def _sweep_chunk(reaction_set, concs, temps, columns):
+    # reaction rates of one chunk of a sweep, module level so process pools can pickle it; the
+    # temperatures of a sweep do not repeat, so the coefficient cache is not used
+    x, temps, _ = reaction_set._check_inputs(concs, temps, ValueError)
+    return reaction_set.net.to_species(reaction_set._progress_rates(x, temps, cached=False))[:, columns]
+
+def _sweep_task(reaction_set, concs, chunks, columns):
+    # reaction rates of several chunks of a sweep, evaluated one chunk at a time
+    return [_sweep_chunk(reaction_set, concs, chunk, columns) for chunk in chunks]
 
 # Elementary Reaction
 class Reaction:
@@ -653,7 +1757,7 @@ class Reaction:
                 raise ValueError('Your A value should be strictly positive. Hint: an A value is less than 0')
 
     def __str__(self):
-        return "vprime: {1}, v2prime: {2}, A: {3}, b: {4}, E: {5}, k: {6}, coeftypes: {7}".format( \
+        return "vprime: {0}, v2prime: {1}, A: {2}, b: {3}, E: {4}, k: {5}, coeftypes: {6}".format( \
                  self.vprime, self.v2prime, self.A, self.b, self.E, self.k, self.coeftype)
 
     def _arrhenius(self, T):
@@ -701,11 +1805,12 @@ class Reaction:
         return self.reaction_coef_forward(T), self.reaction_coef_backward(T)
 
     def reaction_coef_forward(self, T):
-        """Set reaction coefficients for the given float T.
+        """Get the forward reaction coefficient for the given float T. The reaction is
+        not modified, so k keeps the constant coefficient parameter.
         -------
         Args: T; float; the temperature for all reactions
         -------
-        Returns: None
+        Returns: float, the forward reaction coefficient
         -------
         Raises: ValueError when T cannot be cast to a float or T is negative
         """
@@ -720,12 +1825,11 @@ class Reaction:
         if self.coeftype == 'Constant':
             if self.k == 0:
                 print('warning. you are using a constant k with k=0')
-            pass
+            return self.k
         elif self.coeftype == 'Arrhenius':
-            self.k = self._arrhenius(temp)
+            return self._arrhenius(temp)
         else:
-            self.k = self._mod_arrhenius(temp)
-        return self.k
+            return self._mod_arrhenius(temp)
 
     def reaction_coef_backward(self, T):
         raise NotImplementedError()
@@ -825,29 +1929,26 @@ class IrreversibleReaction(Reaction):
             raise ValueError('Your T value should be positive. It was {}.'.format(temp))
 
         k = self.reaction_coef_forward(temp)
-        self.w = k*reduce((lambda x,y: x*y),np.power(x.T[0],self.vprime.T[0]))
-        return self.w
+        return k*reduce((lambda x,y: x*y),np.power(x.T[0],self.vprime.T[0]))
 
 class ReversibleReaction(Reaction):
     """ This class represents reversible reactions.  It inherits from the base Reaction class, and implements
     the methods for the progress rate, and backward reaction coefficient in the manner needed for this type
-    of reaction. This class also queries the NASA coefficients for the backward reaction coefficients.
+    of reaction. This class also looks up the NASA coefficients for the backward reaction coefficients in
+    a NASATable, which is loaded once and may be shared between reactions through the thermo argument.
     =========
     NOTE: If the temperature you enter is equal to the split point for the NASA coefficient range,
             you will get the LOWER of the possible ranges.
     """
-    def __init__(self, react_dict, species):
+    def __init__(self, react_dict, species, thermo=None):
         super().__init__(react_dict, species)
         self.p0 = 1.0e+05
-        self.kb = 0
+        # NASATable of the species, shared between the reactions of a ReactionSet
+        self.thermo = thermo
 
         if not self.rev:
             raise ValueError('You put an irreversible reaction in the reversible reaction class.')
 
-    def __str__(self):
-        return "vprime: {1}, v2prime: {2}, A: {3}, b: {4}, E: {5}, k: {6}, kb: {7}, coeftypes: {8}".format( \
-                 self.vprime, self.v2prime, self.A, self.b, self.E, self.k, self.kb, self.coeftype)
-
     def get_nasa_coefs(self, T):
         """This function getsthe NASA coefficients for a specific temperature.
         --------
@@ -855,28 +1956,11 @@ class ReversibleReaction(Reaction):
         --------
         Returns: numpy array mx7 where m is the number of species in the reaction system.
         --------
-        Raises: ValueError if the query returns nothing.
+        Raises: ValueError if the temperature is outside the range of a species.
          """
-        db_loc = os.path.join(BASE_DIR, "supporting/COEF.sqlite")
-        db = sqlite3.connect(db_loc)
-        cursor = db.cursor()
-        species_sql = ''
-
-        query = self.get_query(cursor, T)
-        q_result = cursor.execute(query).fetchall()
-        if q_result == []:
-            raise ValueError('Invalid temperature range for a species type.')
-        out = []
-
-        # Sort the SQL output by species
-        for s in self.species:
-            for row in q_result:
-                if row[0]==s:
-                    out.append(row[1:])
-
-        out = np.array(out)
-
-        return out
+        if self.thermo is None:
+            self.thermo = NASATable(self.species)
+        return self.thermo.coefs(T)
 
     def get_query(self, cursor, T):
         """This function gets the proper query to use to query the NASA coefficient
@@ -885,22 +1969,21 @@ class ReversibleReaction(Reaction):
         Args: cursor; cursor for the database that holds the NASA coefficients.
               T; float, temperature.
         --------
-        Returns: query, string
+        Returns: query, string with ? placeholders, and params, list of the values to
+                 execute it with
         --------
         Raises: ValueError if the temperature is either above the allowable max
                     value or below the min allowable value for the NASA coefficient
                     database.
         """
-        # Get the species in a usable format
-        species_sql = ''
-        for s in self.species:
-            species_sql+=str('"%s",'%s)
+        # One placeholder per species, the names are passed as parameters
+        species = [str(s) for s in self.species]
+        marks = ','.join('?'*len(species))
 
-        # The purpose of the :-1 slice below is to drop the final , in the string
         qq = ''' SELECT MIN(TLOW), MAX(THIGH), SPECIES_NAME FROM COEF_SQL
-            WHERE SPECIES_NAME in ('''+species_sql[:-1]+''')
-            GROUP BY SPECIES_NAME '''
-        ranges = cursor.execute(qq).fetchall()
+            WHERE SPECIES_NAME in ({})
+            GROUP BY SPECIES_NAME '''.format(marks)
+        ranges = cursor.execute(qq, species).fetchall()
         for r in ranges:
             if T <r[0]:
                 raise ValueError('Your temperature {0} was less or equal to the \
@@ -908,15 +1991,14 @@ class ReversibleReaction(Reaction):
             if T > r[1]:
                 raise ValueError('Your temperature {0} was greater than the \
                                  max possible, {1} for specie {2}'.format(T,r[1],r[2]))
-        temp = np.copy(T)
+        temp = float(T)
         if any([temp==r[0] for r in ranges]):
             temp+=1
 
         query = ''' SELECT SPECIES_NAME, COEFF_1, COEFF_2, COEFF_3, COEFF_4, COEFF_5, COEFF_6, COEFF_7
                     FROM COEF_SQL
-                    WHERE SPECIES_NAME in ('''+species_sql[:-1]+''') AND '''+str(temp)+''' >
-                    TLOW AND '''+str(temp)+''' <=THIGH '''
-        return query
+                    WHERE SPECIES_NAME in ({}) AND ? > TLOW AND ? <= THIGH '''.format(marks)
+        return query, species + [temp, temp]
 
     def reaction_coef_backward(self, T):
         """ This function gets the backward coefficients for the given temperature.
@@ -951,9 +2033,7 @@ class ReversibleReaction(Reaction):
         # Ke
         ke = fact**gamma * np.exp(delta_G_over_RT)
         kf = self.reaction_coef_forward(T)
-        self.kb = float(kf / ke)
-
-        return self.kb
+        return (kf / ke).item()
 
     def progress_rate(self, x_in, T):
         """ This function calculates the progress rate of a reversible reaction of the following form:
@@ -994,11 +2074,553 @@ class ReversibleReaction(Reaction):
 
         k = self.reaction_coef_forward(temp)
         kb = self.reaction_coef_backward(temp)
-        self.w = k*reduce((lambda x,y: x*y),np.power(x.T[0],self.vprime.T[0])) \
+        return k*reduce((lambda x,y: x*y),np.power(x.T[0],self.vprime.T[0])) \
                            - kb*reduce((lambda x,y: x*y),np.power(x.T[0],self.v2prime.T[0]))
-        return self.w
 
 
+class ReactionDict(dict):
+    """ This class is the dictionary of data of one reaction (see get_reactions). Only the nonzero
+    coefficients are stored, in its reactants and products entries, and the dense vprime and v2prime
+    vectors are built from them when they are looked up, so a large mechanism is not held as dense
+    SxR matrices.
+    =========
+    Attributes:
+        n_species: int, the length of the dense vectors
+    """
+    DENSE = {'vprime': 'reactants', 'v2prime': 'products'}
+
+    def __init__(self, n_species, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.n_species = n_species
+
+    def __missing__(self, key):
+        if key not in self.DENSE:
+            raise KeyError(key)
+        entries = self[self.DENSE[key]]
+        v = np.zeros((self.n_species,1))
+        v[list(entries.keys()),0] = list(entries.values())
+        return v
+
+    def get(self, key, default=None):
+        return self[key] if key in self or key in self.DENSE else default
+
+class Stoichiometry:
+    """ This class holds an SxR stoichiometric matrix of a mechanism in coordinate form, sorted by
+    reaction, so its products and sums cost time and memory in the number of nonzero coefficients
+    rather than SxR. A reaction touches a handful of species, so for large mechanisms this is a
+    small fraction of the dense matrix.
+    =========
+    Attributes:
+        shape: tuple (S, R)
+        species, reactions, values: np arrays of length nnz, the row, column and value of each
+                                    nonzero coefficient
+    """
+    def __init__(self, species, reactions, values, shape):
+        species, reactions = np.asarray(species, dtype=int), np.asarray(reactions, dtype=int)
+        values = np.asarray(values, dtype=float)
+        keep = values != 0
+        order = np.lexsort((species[keep], reactions[keep]))
+        self.species, self.reactions = species[keep][order], reactions[keep][order]
+        self.values = values[keep][order]
+        self.shape = tuple(shape)
+        S, R = self.shape
+
+        # segments of the entries of each reaction, and of each species in species order
+        self._counts = np.bincount(self.reactions, minlength=R)
+        self._starts = np.concatenate(([0], np.cumsum(self._counts)[:-1])).astype(int)
+        self._by_species = np.argsort(self.species, kind='stable')
+        species_counts = np.bincount(self.species, minlength=S)
+        self._species_starts = np.concatenate(([0], np.cumsum(species_counts)[:-1])).astype(int)
+        self._used_reactions = self._counts > 0
+        self._used_species = species_counts > 0
+
+        # for each entry, the other entries of its reaction (index nnz pads with a factor of 1)
+        pos = np.arange(len(self.values)) - self._starts[self.reactions]
+        counts = self._counts[self.reactions]
+        self._others = [np.where(counts > offset, self._starts[self.reactions] + (pos + offset) % np.maximum(counts, 1),
+                                 len(self.values)) for offset in range(1, max(self._counts.max(initial=0), 1))]
+
+    @classmethod
+    def from_dense(cls, matrix):
+        # builds the sparse form of a dense SxR array
+        matrix = np.asarray(matrix, dtype=float)
+        species, reactions = np.nonzero(matrix)
+        return cls(species, reactions, matrix[species, reactions], matrix.shape)
+
+    @property
+    def nnz(self):
+        return len(self.values)
+
+    def column(self, j):
+        # dict of the coefficient of each specie index in reaction j
+        entries = slice(self._starts[j], self._starts[j] + self._counts[j])
+        return dict(zip(self.species[entries].tolist(), self.values[entries].tolist()))
+
+    def toarray(self):
+        # the dense SxR array
+        dense = np.zeros(self.shape)
+        dense[self.species, self.reactions] = self.values
+        return dense
+
+    def __sub__(self, other):
+        # the difference of two matrices of the same shape, with the entries they share merged
+        R = self.shape[1]
+        flat = np.concatenate((self.species*R + self.reactions, other.species*R + other.reactions))
+        keys, inverse = np.unique(flat, return_inverse=True)
+        values = np.bincount(inverse, weights=np.concatenate((self.values, -other.values)))
+        return Stoichiometry(keys // R, keys % R, values, self.shape)
+
+    def _reduce(self, ufunc, terms, starts, used, width, identity):
+        # reduces the last axis of terms over consecutive segments, one per used output column
+        out = np.full(terms.shape[:-1] + (width,), identity)
+        if self.nnz:
+            out[..., used] = ufunc.reduceat(terms, starts[used], axis=-1)
+        return out
+
+    def products(self, x):
+        """ This function returns the concentration products of the mass-action law,
+        prod_s x_s**v_sj for every reaction j.
+        --------
+        Args: x; np array of length S, or NxS
+        --------
+        Returns: np array of length R, or NxR
+        """
+        return self._reduce(np.multiply, x[..., self.species]**self.values,
+                            self._starts, self._used_reactions, self.shape[1], 1.)
+
+    def product_gradient(self, x):
+        """ This function returns the derivatives of the concentration products with respect to the
+        concentrations, one for each nonzero coefficient: d/dx_s prod_l x_l**v_lj for entry (s, j).
+        Leave-one-out products are used, so zero concentrations are safe.
+        --------
+        Args: x; np array of length S
+        --------
+        Returns: np array of length nnz
+        """
+        xs = x[self.species]
+        others = np.append(xs**self.values, 1.)
+        grad = self.values*xs**(self.values-1)
+        for index in self._others:
+            grad *= others[index]
+        return grad
+
+    def to_species(self, w):
+        """ This function sums reaction quantities into the species, w @ v.T, for example the
+        reaction rates from the progress rates.
+        --------
+        Args: w; np array of length R, or NxR
+        --------
+        Returns: np array of length S, or NxS
+        """
+        terms = (w[..., self.reactions]*self.values)[..., self._by_species]
+        return self._reduce(np.add, terms, self._species_starts, self._used_species, self.shape[0], 0.)
+
+    def to_reactions(self, y):
+        """ This function sums species quantities into the reactions, y @ v, for example the
+        enthalpy change of each reaction.
+        --------
+        Args: y; np array of length S, or NxS
+        --------
+        Returns: np array of length R, or NxR
+        """
+        return self._reduce(np.add, y[..., self.species]*self.values,
+                            self._starts, self._used_reactions, self.shape[1], 0.)
+
+    def pairs(self, other):
+        """ This function pairs the entries of this matrix with the entries of other in the same
+        reaction, to assemble products like v @ d.T with d shaped like other.
+        --------
+        Args: other; Stoichiometry of the same shape
+        --------
+        Returns: mine, theirs; np arrays of entry indexes, and flat; np array of the flattened SxS
+                 positions species[mine]*S + other.species[theirs]
+        """
+        mine, theirs = [], []
+        counts = other._counts[self.reactions]
+        for offset in range(other._counts.max(initial=0)):
+            has = np.flatnonzero(counts > offset)
+            mine.append(has)
+            theirs.append(other._starts[self.reactions[has]] + offset)
+        mine = np.concatenate(mine).astype(int) if mine else np.zeros(0, dtype=int)
+        theirs = np.concatenate(theirs).astype(int) if theirs else np.zeros(0, dtype=int)
+        return mine, theirs, self.species[mine]*self.shape[0] + other.species[theirs]
+
+class KineticsTable:
+    """ This class holds the forward and backward coefficients of a ReactionSet tabulated on a
+    grid uniform in 1/T, and interpolates log k linearly in 1/T between the grid points. That
+    is exact for Arrhenius coefficients and smooth for the others, so a modest grid meets
+    tight error targets. It is built by ReactionSet.tabulate.
+    =========
+    Attributes:
+        tmin, tmax: floats, the temperature range covered
+        rtol: float, the relative error target
+        error: float, the largest relative error found against the exact coefficients
+        npoints: int, the number of grid points
+    """
+    def __init__(self, reaction_set, tmin, tmax, rtol=1e-6, max_points=2**16+1):
+        try:
+            self.tmin, self.tmax, self.rtol = float(tmin), float(tmax), float(rtol)
+        except (TypeError, ValueError):
+            raise ValueError('Your tmin, tmax and rtol must be floats')
+        if not 0 < self.tmin < self.tmax:
+            raise ValueError('Your range must have 0 < tmin < tmax, it was [{}, {}]'.format(tmin, tmax))
+        if self.rtol <= 0:
+            raise ValueError('Your rtol must be positive, not {}'.format(rtol))
+        self.max_points = int(max_points)
+
+        npoints = 33
+        while True:
+            u = np.linspace(1./self.tmax, 1./self.tmin, npoints)
+            self._set_grid(u, *reaction_set._exact_coefs(1./u))
+
+            # Check halfway between the grid points, where the interpolation is worst
+            mid = 1./((u[:-1] + u[1:])/2.)
+            exact = np.hstack(reaction_set._exact_coefs(mid))
+            approx = np.hstack(self.coefs(mid))
+            nonzero = exact != 0
+            self.error = np.max(np.abs(approx[nonzero] - exact[nonzero]) / np.abs(exact[nonzero]), initial=0.)
+            self.npoints = npoints
+            if self.error <= self.rtol:
+                break
+            if 2*npoints-1 > self.max_points:
+                raise ValueError('Relative error {} above rtol {} with {} points. Hint: raise max_points or rtol'.format( \
+                                 self.error, self.rtol, npoints))
+            npoints = 2*npoints-1
+
+    def _set_grid(self, u, kf, kb):
+        # stores log k on the grid u = 1/T, coefficients that are 0 everywhere are kept as 0
+        self._u0 = u[0]
+        self._du = u[1] - u[0]
+        self._n = len(u)
+        k = np.hstack((kf, kb))
+        self._zero = np.all(k == 0, axis=0)
+        with np.errstate(divide='ignore'):
+            self._logk = np.where(self._zero, 0., np.log(np.abs(k)))
+        self._sign = np.sign(k[0])
+        self._R = kf.shape[1]
+
+    def covers(self, T):
+        # boolean mask of the temperatures inside the table range
+        return (T >= self.tmin) & (T <= self.tmax)
+
+    def coefs(self, T):
+        """This function interpolates the coefficients at temperatures inside the table range.
+        --------
+        Args: T; np array of length nT, temperatures.
+        --------
+        Returns: kf, kb; np arrays nTxR (kb is 0 for irreversible reactions)
+        """
+        pos = (1./T - self._u0) / self._du
+        i = np.clip(np.floor(pos).astype(int), 0, self._n - 2)
+        frac = (pos - i).reshape(-1,1)
+        logk = self._logk[i] + frac*(self._logk[i+1] - self._logk[i])
+        k = np.where(self._zero, 0., self._sign*np.exp(logk))
+        return k[:,:self._R], k[:,self._R:]
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+class CoefCache:
+    """ This class is a bounded, thread-safe LRU cache of the forward and backward coefficients
+    of a ReactionSet, keyed by temperature. It is used by ReactionSet when constructed with
+    cache_size > 0, so integrators taking several stages at the same temperature skip the
+    Arrhenius and NASA polynomial evaluations. Batches, sweeps and arrays of more temperatures
+    than maxsize bypass it.
+    =========
+    Methods:
+        get(T): returns the cached (kf, kb) rows for temperature T, or None
+        put(T, kf, kb): stores the rows for temperature T, evicting the least recently used
+        invalidate(): drops every entry, keeping the statistics
+        clear(): drops every entry and resets the statistics
+        info(): returns CacheInfo(hits, misses, maxsize, currsize)
+    """
+    def __init__(self, maxsize):
+        if int(maxsize) != maxsize or maxsize < 1:
+            raise ValueError('Your cache size must be a positive integer, not {}'.format(maxsize))
+        self.maxsize = int(maxsize)
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, T):
+        with self._lock:
+            row = self._data.get(float(T))
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._data.move_to_end(float(T))
+            return row
+
+    def put(self, T, kf, kb):
+        with self._lock:
+            self._data[float(T)] = (np.array(kf), np.array(kb))
+            self._data.move_to_end(float(T))
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self):
+        with self._lock:
+            self._data.clear()
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self):
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.maxsize, len(self._data))
+
+    def __getstate__(self):
+        # the lock cannot be pickled (for process pools), a new one is made on unpickling
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+class NASATable:
+    """ This class holds the NASA polynomial coefficients of a set of species in memory.
+    The coefficients are read from supporting/COEF.sqlite (or db_loc) once, on initialization, into
+    contiguous arrays for the low and high temperature ranges, so looking them up at a
+    temperature is an array selection with no database access.
+    =========
+    Attributes:
+        species: list of the species names, in the order of the arrays
+        tlow, tmid, thigh: np arrays of length S, the temperature bounds of each species
+        low, high: np arrays Sx7, the coefficients of the low and high temperature ranges
+        missing: list of species without coefficients in the database
+    ---------
+    NOTE: If the temperature you enter is equal to the split point for the NASA coefficient range,
+            you will get the LOWER of the possible ranges.
+    =========
+    Examples:
+
+    >>> table = NASATable(['H', 'O2'])
+    >>> table.coefs(500).shape
+    (2, 7)
+    >>> table.coefs([500., 1500., 2500.]).shape
+    (3, 2, 7)
+    """
+    def __init__(self, species, db_loc=None):
+        self.species = [str(s) for s in species]
+        rows = _coef_db(db_loc).execute(''' SELECT SPECIES_NAME, TLOW, THIGH, COEFF_1, COEFF_2, COEFF_3,
+                              COEFF_4, COEFF_5, COEFF_6, COEFF_7 FROM COEF_SQL WHERE SPECIES_NAME in ({})
+                              ORDER BY TLOW '''.format(','.join('?'*len(self.species))),
+                                        self.species).fetchall()
+
+        # Rows come back ordered by TLOW, so the first row of a species is its low range
+        ranges = {}
+        for row in rows:
+            ranges.setdefault(row[0], []).append(row[1:])
+
+        n = len(self.species)
+        self.tlow, self.tmid, self.thigh = np.full(n, np.nan), np.full(n, np.nan), np.full(n, np.nan)
+        self.low, self.high = np.full((n,7), np.nan), np.full((n,7), np.nan)
+        self.missing = []
+        for i, s in enumerate(self.species):
+            if s not in ranges:
+                self.missing.append(s)
+                continue
+            low, high = ranges[s][0], ranges[s][-1]
+            self.tlow[i], self.tmid[i], self.thigh[i] = low[0], low[1], high[1]
+            self.low[i], self.high[i] = low[2:], high[2:]
+
+    @classmethod
+    def from_arrays(cls, species, tlow, tmid, thigh, low, high):
+        # builds the table from coefficient arrays already looked up, as stored in a compiled mechanism
+        table = cls.__new__(cls)
+        table.species = [str(s) for s in species]
+        table.tlow, table.tmid, table.thigh, table.low, table.high = tlow, tmid, thigh, low, high
+        table.missing = [s for s, t in zip(table.species, tlow) if np.isnan(t)]
+        return table
+
+    def check_range(self, T):
+        """This function checks the temperatures are inside the range of every species.
+        --------
+        Args: T; np array of length nT, temperatures.
+        --------
+        Raises: ValueError if a species has no coefficients, or if a temperature is either above
+                    the allowable max value or below the min allowable value for a species.
+        """
+        if self.missing:
+            raise ValueError('No NASA coefficients found for species {}'.format(self.missing))
+        below = T.reshape(-1,1) < self.tlow
+        if below.any():
+            t, s = np.unravel_index(np.argmax(below), below.shape)
+            raise ValueError('Your temperature {0} was less or equal to the \
+                             min possible, {1} for specie {2}'.format(T[t], self.tlow[s], self.species[s]))
+        above = T.reshape(-1,1) > self.thigh
+        if above.any():
+            t, s = np.unravel_index(np.argmax(above), above.shape)
+            raise ValueError('Your temperature {0} was greater than the \
+                             max possible, {1} for specie {2}'.format(T[t], self.thigh[s], self.species[s]))
+
+    def coefs(self, T):
+        """This function gets the NASA coefficients of every species at the given temperature(s).
+        --------
+        Args: T; float or 1-D array of floats, temperature(s).
+        --------
+        Returns: numpy array Sx7 for a float T, or nTxSx7 for an array of nT temperatures.
+        --------
+        Raises: ValueError if a temperature is outside the range of a species (see check_range).
+        """
+        temps = np.array(T, dtype=float)
+        self.check_range(temps.reshape(-1))
+        return np.where((temps[...,None] > self.tmid)[...,None], self.high, self.low)
+
+
+class RateTable:
+    """ This class holds a table of reaction rates versus temperature as float64 arrays, with the
+    column labels kept separately. It is returned by ReactionSet.to_table and written by
+    _table_output. np.asarray (and indexing) gives the labelled object table, with the labels in
+    the first row(s) and the temperatures in the first column.
+    =========
+    Attributes:
+        temps: np array of length nT, the temperatures
+        rates: np array nTxC, the reaction rates, one column per queried specie (and reaction)
+        labels: list of the C column labels (species)
+        sublabels: list of the C second row labels (reactions), or None
+        int_temps: boolean, True if the temperatures were given as integers, which are then
+                   written as integers
+    """
+    def __init__(self, temps, rates, labels, sublabels=None, int_temps=False):
+        self.temps = np.asarray(temps, dtype=float).reshape(-1)
+        self.labels = list(labels)
+        self.rates = np.asarray(rates, dtype=float).reshape(len(self.temps), len(self.labels))
+        self.sublabels = None if sublabels is None else list(sublabels)
+        self.int_temps = int_temps
+
+    def header(self):
+        # the label rows of the table
+        rows = [['T'] + self.labels]
+        if self.sublabels is not None:
+            rows.append([''] + self.sublabels)
+        return rows
+
+    @property
+    def shape(self):
+        return (len(self.header()) + len(self.temps), self.rates.shape[1] + 1)
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __array__(self, dtype=None, copy=None):
+        header = self.header()
+        table = np.zeros(self.shape, dtype=object)
+        for i, row in enumerate(header):
+            table[i] = row
+        table[len(header):, 0] = self.temps.astype(int) if self.int_temps else self.temps
+        table[len(header):, 1:] = self.rates
+        return table if dtype is None else table.astype(dtype)
+
+    def __getitem__(self, key):
+        # only the selected rows of the object table are built
+        if isinstance(key, tuple) and len(key) == 2 and not any(k is None or k is Ellipsis for k in key):
+            rows, cols = key
+        elif isinstance(key, tuple) or key is None or key is Ellipsis or np.ndim(key) > 1:
+            return np.asarray(self)[key]
+        else:
+            rows, cols = key, slice(None)
+        if isinstance(rows, (int, np.integer, slice)):
+            index = range(len(self))[rows]
+        else:
+            index = np.arange(len(self))[rows]
+        picked = np.atleast_1d(np.asarray(index, dtype=int))
+        header = self.header()
+        table = np.zeros((len(picked), self.shape[1]), dtype=object)
+        for k in np.flatnonzero(picked < len(header)):
+            table[k] = header[picked[k]]
+        body = picked >= len(header)
+        temps = self.temps[picked[body] - len(header)]
+        table[body, 0] = temps.astype(int) if self.int_temps else temps
+        table[body, 1:] = self.rates[picked[body] - len(header)]
+        return table[0][cols] if np.ndim(index) == 0 else table[:, cols]
+
+    def row_format(self, number, delimiter, prefix='', suffix='\n'):
+        # %-format string of one row, the temperature first and then the rates
+        return prefix + delimiter.join(['%d' if self.int_temps else number] + [number]*self.rates.shape[1]) + suffix
+
+    def write_rows(self, f, row_format, chunk_size=TABLE_CHUNK, ready=None):
+        """This function writes the temperatures and rates, chunk_size rows at a time. Each chunk is
+        formatted with one % operation on a repeated row format.
+        --------
+        Args:   f, file open for writing
+                row_format, str - the format of one row, as from row_format
+                chunk_size, int - the number of rows formatted and written at once
+                ready, iterable of the number of rows computed so far, if the table is written while
+                       it is computed (see _rows_ready); the rows are written as they become ready
+        """
+        n, start = len(self.temps), 0
+        for stop in ([n] if ready is None else ready):
+            while stop - start >= chunk_size or (stop == n and start < n):
+                end = min(start + chunk_size, stop)
+                block = np.column_stack((self.temps[start:end], self.rates[start:end]))
+                f.write((row_format*len(block)) % tuple(block.ravel().tolist()))
+                start = end
+
+class _TableWriter:
+    """ This class runs table writes on a background thread, fed through a bounded queue, so the
+    next table (or the next rows of a table) are computed while the previous ones are flushed to
+    disk. Internal class. The first error of a write is raised by close, or by the next submit,
+    and the writes queued after it are skipped.
+    =========
+    Methods:
+        submit(func, *args), queues func(*args) to run on the writer thread
+        close(reraise=True), waits for the queued writes and raises the first error
+    """
+    def __init__(self, maxsize=WRITER_QUEUE):
+        self.error = None
+        self._jobs = queue.Queue(maxsize)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            if self.error is None:
+                try:
+                    job[0](*job[1:])
+                except BaseException as err:
+                    self.error = err
+
+    def submit(self, func, *args):
+        if self.error is not None:
+            raise self.error
+        self._jobs.put((func,) + args)
+
+    def close(self, reraise=True):
+        self._jobs.put(None)
+        self._thread.join()
+        if reraise and self.error is not None:
+            raise self.error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # an error of the caller takes precedence over one of the writes
+        self.close(reraise=exc_type is None)
+
+def _rows_ready(ready):
+    """This generator yields the number of table rows computed so far, as put on the ready queue by
+    the computing thread, until it puts None. An exception put on the queue is raised, to abort the
+    write of a table whose computation failed.
+    """
+    while True:
+        stop = ready.get()
+        if stop is None:
+            return
+        if isinstance(stop, BaseException):
+            raise stop
+        yield stop
+
 class MultiReactionOutput:
     """
     This class is a wrapper class for parsing multiple reaction outputs at one time.
@@ -1059,11 +2681,10 @@ class MultiReactionOutput:
 
         # Error checking: check if the user passes in reasonable temperature inputs
         temps = np.array(temps,ndmin=1)
-        for i in range(len(temps)):
-            try:
-                temps[i] = float(temps[i])
-            except:
-                raise TypeError('Non numeric value found in temperature array')
+        try:
+            temps.astype(float)
+        except (TypeError, ValueError):
+            raise TypeError('Non numeric value found in temperature array')
         # (nb most of the reaction error checking is taken care of when the reactions are instantiated)
 
         # Make output directory, and 'supporting' subdirectory if user chooses to store original tables
@@ -1072,92 +2693,91 @@ class MultiReactionOutput:
         if include_supporting and not os.path.exists(os.path.join(output_dir,"supporting")):
             os.makedirs(os.path.join(output_dir,"supporting"))
 
-        # Get the output table of each reaction class
-        output_tables = []
-        for i,reaction in enumerate(self.reaction_set):
-            output_tables.append(reaction.to_table(query_species, concs[i], temps, out_type = out_type,
-                              out_file = output_dir + "/supporting/reaction" + str(i), save_output=include_supporting))
+        _check_table_output(output_dir+"/multireaction", out_type)
+        with _TableWriter() as writer:
+            # Get the output table of each reaction class; each supporting table is written in the
+            # background while the next reaction's table is computed
+            output_tables = []
+            for i,reaction in enumerate(self.reaction_set):
+                supporting_file = output_dir + "/supporting/reaction" + str(i)
+                output_tables.append(reaction.to_table(query_species, concs[i], temps, out_type = out_type,
+                                  out_file = supporting_file, save_output=False))
+                if include_supporting:
+                    writer.submit(_table_output, output_tables[i], query_species, supporting_file, out_type)
 
-        # Assemble consolidated output table
-        num_reactions = len(output_tables)
-        num_species = len(query_species)
+            # Assemble consolidated output table
+            num_reactions = len(output_tables)
+            num_species = len(query_species)
 
-        combined_output_table = np.zeros((len(output_tables[0]),num_reactions*num_species+1), dtype=object)
+            # Interweave each reaction table's data columns into a single output table
+            rates = np.empty((len(output_tables[0].temps), num_reactions*num_species))
+            for i in range(num_reactions):
+                rates[:, i::num_reactions] = output_tables[i].rates
 
-        # Set the temperatures column
-        combined_output_table[:,0] = output_tables[0][:,0]
+            # Label each column with its specie, and with its reaction number in a second row
+            labels = [specie for specie in query_species for i in range(num_reactions)]
+            reac_labels = ["rxn " + str(i) for specie in query_species for i in range(num_reactions)]
+            combined_output_table = RateTable(output_tables[0].temps, rates, labels, reac_labels,
+                                              output_tables[0].int_temps)
 
-        # Interweave each reaction table's data columns into a single output table
-        for i in range(num_reactions):
-            combined_output_table[:, i+1::num_reactions] = output_tables[i][:, 1:]
+            writer.submit(_table_output, combined_output_table, query_species, output_dir+"/multireaction", out_type)
 
-        # Add additional row to label reaction number
-        reac_labels = np.array([""] * combined_output_table.shape[1], dtype=object)
-        for i in range(num_reactions):
-            reac_labels[i+1::num_reactions] = "rxn " + str(i)
-        combined_output_table = np.insert(combined_output_table, 1, reac_labels, axis=0)
 
-        _table_output(combined_output_table, query_species, output_dir+"/multireaction", out_type, multi_output=True)
 
+def _check_table_output(out_file, out_type):
+    """This function checks the output file and type of a table.  Internal function.
+    --------
+    Raises: TypeError if invalid output type is specified
+            TypeError if non-str output filename is provided
+    """
+    # Error checking: confirm output type is reasonable
+    if out_type not in TABLE_EXTENSIONS:
+        raise TypeError('Output type not recognized')
 
+    # Error checking: confirm filename is a string
+    if type(out_file) is not str:
+        raise TypeError("Filename must be a string")
 
-def _table_output(out_table, query_species, out_file, out_type = 'csv', multi_output = False):
+def _table_output(out_table, query_species, out_file, out_type = 'csv', ready = None):
     """This function outputs the table into one of four desired file formats.  Internal function.
+    The csv, txt and latex tables are formatted and written TABLE_CHUNK rows at a time.
     --------
-    Args:   out_table, the table to be output to file.  Must have column headers corresponding to each specie, and row 0
-                must contain temperature data.
+    Args:   out_table, RateTable - the table to be output to file, with a second row of reaction labels
+                for multi-reaction output
             query_species, list of species which are being queried (str), in the same order as the table headers
             out_file, filename to output to
             out_type, one of ['csv', 'txt', 'latex', 'hdf5']
-            multi_output, boolean which defines whether this is multi-reaction output or not
+            ready, iterable of the number of rows computed so far, if the table is written while it is
+                computed (see _rows_ready)
     --------
     Returns: none, but saves table in out_file
     --------
     Raises: TypeError if invalid output type is specified
             TypeError if non-str output filename is provided
      """
-    # Error checking: confirm output type is reasonable
-    out_types = set(['csv', 'txt', 'latex', 'hdf5'])
-    if out_type not in out_types:
-        raise TypeError('Output type not recognized')
-
-    # Error checking: confirm filename is a string
-    if type(out_file) is not str:
-        raise TypeError("Filename must be a string")
+    _check_table_output(out_file, out_type)
 
     # Parse table output and structure output per type
     if out_type == 'csv':
         with open(out_file + ".csv", "w", newline='') as f:
-            writer = csv.writer(f)
-            writer.writerows(out_table)
+            csv.writer(f).writerows(out_table.header())
+            out_table.write_rows(f, out_table.row_format('%r', ',', suffix='\r\n'), ready=ready)
         print("Output {} to file: {}.csv".format(query_species, out_file))
 
     elif out_type == 'txt':
-        # Preformatting for txt output
-        out_strings = np.array(
-            [x if type(x) is not float
-             else format(x, '.2e') for x in out_table.flatten()])
-        out_strings = out_strings.reshape(out_table.shape)
-
-        # Output to file
+        # Output to file, tab separated with the rates in scientific notation
         with open(out_file + ".txt", "w", newline='') as f:
-            writer = csv.writer(f, delimiter='\t')
-            writer.writerows(out_strings)
+            csv.writer(f, delimiter='\t').writerows(out_table.header())
+            out_table.write_rows(f, out_table.row_format('%.2e', '\t', suffix='\r\n'), ready=ready)
         print("Output {} to file: {}.txt".format(query_species, out_file))
 
     elif out_type == 'latex':
-        # Prepare output table for latex output
-        out_strings = np.array(
-            [x if type(x) is not float
-             else format(x, '.2e') for x in out_table.flatten()])
-        out_strings = out_strings.reshape(out_table.shape)
-
         # Prepare necessary latex tags before and after table content
         latex_preamble = ['\documentclass[11pt,letter]{article}',
                           '\\begin{document}',
                           'Reaction rates versus temperature - selected species:'
                           '\\begin{table}[h]',
-                          '\\begin{tabular}{' + str('c|' * (out_strings.shape[1]))[:-1] + '}'
+                          '\\begin{tabular}{' + str('c|' * (out_table.shape[1]))[:-1] + '}'
                           ]
         latex_postamble = ['\\end{tabular}',
                            '\\end{table}',
@@ -1167,39 +2787,28 @@ def _table_output(out_table, query_species, out_file, out_type = 'csv', multi_ou
         # Output latex to file
         with open(out_file + '.tex', 'w') as f:
             f.write('\n'.join(latex_preamble) + '\n')
-            for row in out_strings:
+            for row in out_table.header():
                 f.write('\\hline\n')
                 f.write(' & '.join(row) + '\\\\\n')
+            out_table.write_rows(f, out_table.row_format('%.2e', ' & ', '\\hline\n', '\\\\\n'), ready=ready)
             f.write('\n'.join(latex_postamble))
         print("Output {} to file: {}.tex".format(query_species, out_file))
 
     elif out_type == 'hdf5':
         # Solve number of species and reactions from the passed output table
         num_species = len(query_species)
-        num_rxns = (out_table.shape[1] - 1) // num_species
+        num_rxns = out_table.rates.shape[1] // num_species
 
-        # Set up memory locations for the HDF% tree
-        specie_grps = np.zeros(num_species, dtype=object)
-        specie_dsets = np.zeros((num_species, num_rxns), dtype=object)
+        # The datasets are written whole, once all the rows are computed
+        for _ in (ready or ()):
+            pass
 
-        # Output to HDF5
+        # Output to HDF5, one group per specie with a [T, rate] dataset per reaction
+        h5py = _h5py()
         with h5py.File(out_file + '.hdf5', 'w') as root:
-            for i, specie_table in enumerate(np.split(out_table[:, 1:], num_species, axis=1)):
-                specie_grps[i] = root.create_group(query_species[i])
+            for i in range(num_species):
+                specie_grp = root.create_group(query_species[i])
                 for j in range(num_rxns):
-
-                    if num_rxns == 1: # This is a single reaction table
-                        dataset = np.concatenate(
-                        (out_table[:, 0].reshape(-1, 1),
-                         specie_table),
-                        axis=1)[1:, :]
-
-                    else: # This is a multi-reaction table
-                        dataset = np.concatenate(
-                        (out_table[:, 0].reshape(-1, 1),
-                         specie_table[:,j].reshape(-1,1)),
-                        axis=1)[2:, :]
-
-                    specie_dsets[i,j] = specie_grps[i].create_dataset("RXN"+str(j),
-                                                                      data = dataset.astype('float'))
+                    dataset = np.column_stack((out_table.temps, out_table.rates[:, i*num_rxns + j]))
+                    specie_grp.create_dataset("RXN"+str(j), data = dataset)
         print("Output {} to file: {}.hdf5".format(query_species, out_file))
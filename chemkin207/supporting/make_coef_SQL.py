@@ -114,6 +114,9 @@ def coef_sql(species_list):
               COEFF_5 FLOAT,
               COEFF_6 FLOAT,
               COEFF_7 FLOAT)''')
+
+    # Index the species and temperature range lookups made by chemkin207
+    cursor.execute('''CREATE INDEX COEF_SQL_SPECIES_RANGE ON COEF_SQL (SPECIES_NAME, TLOW, THIGH)''')
     db.commit()
 
     # Output each species information to table COEF_SQL
@@ -144,5 +147,6 @@ def coef_sql(species_list):
     db.close()
 
 
-# Parse thermo.txt and import into COEF.SQLITE
-coef_sql(get_species_list('thermo.txt'))
+if __name__ == '__main__':
+    # Parse thermo.txt and import into COEF.SQLITE
+    coef_sql(get_species_list('thermo.txt'))
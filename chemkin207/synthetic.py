@@ -0,0 +1,185 @@
+"""
+    Synthetic mechanism generator for scaling tests.
+
+    Writes valid chemkin207 xml mechanisms with a chosen number of species and reactions,
+    fraction of reversible reactions and mix of rate coefficient types. The species are
+    drawn from supporting/thermo.txt, the source of the NASA coefficient database, so the
+    reversible reactions can be evaluated between 300 K and 3000 K.
+    """
+import os
+import numpy as np
+
+from .chemkin207 import NASATable, _nasa_properties
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+THERMO_TXT = os.path.join(BASE_DIR, 'supporting/thermo.txt')
+# Rate coefficient types, as the tags of the rateCoeff element
+COEFTYPES = ('Arrhenius', 'modifiedArrhenius', 'Constant')
+# Largest |delta G / RT| of a reversible reaction over the temperature range of its species, so
+# the equilibrium and backward coefficients stay in floating point range
+MAX_DELTA_G_RT = 30.
+# Number of rounds of draws of the reactions before giving up on the bound above
+MAX_DRAWS = 1000
+
+def thermo_species(thermo_file=THERMO_TXT):
+    """This function reads the species names of a thermo file in the NASA polynomial format,
+    the first field of each record's first line (the line numbered 1 in column 80).
+    --------
+    Args: thermo_file, str - the thermo file
+    --------
+    Returns: list of str, the species names in file order
+    """
+    species = []
+    with open(thermo_file) as f:
+        for line in f:
+            line = line.rstrip('\n')
+            if len(line) >= 80 and line[79] == '1' and line.split():
+                species.append(line.split()[0])
+    return species
+
+def _sides(n_species):
+    # every reaction side of one or two distinct species with coefficients of 1 or 2, as np arrays
+    # n_sidesx2 of the species indexes and coefficients (coefficient 0 for the missing second specie),
+    # and the probability of each side: one or two species equally, a coefficient of 2 one time in 4
+    pairs = [(i, j) for i in range(n_species) for j in range(i + 1, n_species)]
+    species = [(i, 0) for i in range(n_species) for c in (1, 2)] + [p for p in pairs for c in range(4)]
+    coefs = [(c, 0) for i in range(n_species) for c in (1, 2)] + \
+            [c for p in pairs for c in ((1, 1), (1, 2), (2, 1), (2, 2))]
+    coefs = np.array(coefs)
+    p = np.where(coefs == 2, .25, .75).prod(axis=1, where=coefs > 0)
+    p = np.where(coefs[:, 1] > 0, p/max(len(pairs), 1), p/n_species)
+    return np.array(species), coefs, p/p.sum()
+
+def _draw_reactions(rng, n_species, is_reversible, G_RT):
+    """This function draws the reactant and product sides of every reaction, with no specie on
+    both sides. Every reaction is drawn at once, and the rejected ones again, until each reversible
+    reaction has |delta G / RT| at most MAX_DELTA_G_RT at every temperature of G_RT.
+    --------
+    Args:   rng, np.random.RandomState
+            n_species, int - the number of species
+            is_reversible, np array of bool, whether each reaction is reversible
+            G_RT, np array nTxS of the G/RT of each specie, or None if no reaction is reversible
+    --------
+    Returns: species, coefs, np arrays n_sidesx2 of the sides (see _sides), and reactants, products,
+             np arrays of the side of each reaction
+    --------
+    Raises: ValueError if a reaction is still rejected after MAX_DRAWS rounds
+    """
+    species, coefs, p = _sides(n_species)
+    if G_RT is not None:
+        G_side = (G_RT[:, species] * coefs).sum(axis=2).T
+    n = len(is_reversible)
+    reactants, products = np.zeros(n, dtype=int), np.zeros(n, dtype=int)
+    pending = np.arange(n)
+    for _ in range(MAX_DRAWS):
+        if not pending.size:
+            break
+        r, q = rng.choice(len(p), len(pending), p=p), rng.choice(len(p), len(pending), p=p)
+        # a specie (with a nonzero coefficient) on both sides
+        same = (species[r][:, :, None] == species[q][:, None, :]) & \
+               (coefs[r][:, :, None] > 0) & (coefs[q][:, None, :] > 0)
+        ok = ~same.any(axis=(1, 2))
+        rev = is_reversible[pending]
+        if rev.any():
+            ok[rev] &= np.max(np.abs(G_side[q[rev]] - G_side[r[rev]]), axis=1) <= MAX_DELTA_G_RT
+        reactants[pending[ok]], products[pending[ok]] = r[ok], q[ok]
+        pending = pending[~ok]
+    if pending.size:
+        raise ValueError('No reversible reaction with |delta G / RT| <= {} was found among the {} species. '
+                         'Hint: use more species or a lower reversible fraction'.format(MAX_DELTA_G_RT, n_species))
+    return species, coefs, reactants, products
+
+def _coefficient_xml(coeftype, rng):
+    # the rateCoeff content of one reaction, with parameters of the usual magnitudes; the activation
+    # energies are bounded so the forward coefficients stay above 1e-10 down to 300 K, far from the
+    # underflow check of ReactionSet, and A*T**b stays below about 1e14 up to 3000 K
+    if coeftype == 'Arrhenius':
+        return ('<Arrhenius>\n          <A>{:.4e}</A>\n          <E>{:.4e}</E>\n        </Arrhenius>'
+                .format(10**rng.uniform(6, 13), rng.uniform(0, 8e4)))
+    elif coeftype == 'modifiedArrhenius':
+        b = rng.uniform(-1, 2.5)
+        return ('<modifiedArrhenius>\n          <A>{:.4e}</A>\n          <b>{:.6g}</b>\n          <E>{:.4e}</E>\n'
+                '        </modifiedArrhenius>'.format(10**rng.uniform(3, min(10, 14 - b*np.log10(3000))), b,
+                                                     rng.uniform(0, 6e4)))
+    return '<Constant>\n          <k>{:.4e}</k>\n        </Constant>'.format(10**rng.uniform(2, 8))
+
+def synthetic_mechanism(out_file, n_species, n_reactions, reversible=0.5, coeftypes=None, seed=None,
+                        thermo_file=THERMO_TXT):
+    """This function writes a random mechanism in the chemkin207 xml format. Each reaction has one
+    or two reactants and one or two products, distinct species with coefficients of 1 or 2. The
+    reversible reactions are drawn with |delta G / RT| at most MAX_DELTA_G_RT over the common
+    temperature range of their species. The same arguments and seed always give the same file.
+    --------
+    Args:   out_file, str - the xml file to write
+            n_species, int - the number of species, drawn from thermo_file (2 to the number of species in it)
+            n_reactions, int - the number of reactions
+            reversible, float - the fraction of reversible reactions, between 0 and 1
+            coeftypes, dict of the weight of each rate coefficient type in COEFTYPES, or None to use
+                       the three types equally
+            seed, int - the seed of the random generator
+            thermo_file, str - the thermo file the species are drawn from
+    --------
+    Returns: str, out_file
+    --------
+    Raises: ValueError if n_species or n_reactions is out of range, reversible is not between 0 and 1,
+                or coeftypes has an unknown type or weights that are negative or all zero
+            ValueError if no reversible reaction within MAX_DELTA_G_RT is found (see _draw_reactions)
+    """
+    names = thermo_species(thermo_file)
+    if int(n_species) != n_species or not 2 <= n_species <= len(names):
+        raise ValueError('Your n_species must be an integer from 2 to {}, not {}. Hint: the species are drawn '
+                         'from {}'.format(len(names), n_species, thermo_file))
+    if int(n_reactions) != n_reactions or n_reactions < 1:
+        raise ValueError('Your n_reactions must be a positive integer, not {}'.format(n_reactions))
+    if not 0 <= reversible <= 1:
+        raise ValueError('Your reversible fraction must be between 0 and 1, not {}'.format(reversible))
+    if coeftypes is None:
+        coeftypes = dict.fromkeys(COEFTYPES, 1.)
+    for coeftype, weight in coeftypes.items():
+        if coeftype not in COEFTYPES:
+            raise ValueError('There is no rate coefficient type {}. Hint: use {}'.format(coeftype, COEFTYPES))
+        if weight < 0:
+            raise ValueError('The weight of {} must not be negative, not {}'.format(coeftype, weight))
+    weights = np.array([coeftypes.get(coeftype, 0.) for coeftype in COEFTYPES], dtype=float)
+    if weights.sum() <= 0:
+        raise ValueError('At least one rate coefficient type needs a positive weight')
+
+    rng = np.random.RandomState(seed)
+    n_species, n_reactions = int(n_species), int(n_reactions)
+    names = [names[i] for i in np.sort(rng.choice(len(names), n_species, replace=False))]
+    # exactly round(reversible*n_reactions) reversible reactions, in random positions
+    is_reversible = np.zeros(n_reactions, dtype=bool)
+    is_reversible[:int(round(reversible*n_reactions))] = True
+    rng.shuffle(is_reversible)
+    types = rng.choice(len(COEFTYPES), n_reactions, p=weights/weights.sum())
+
+    G_RT = None
+    if is_reversible.any():
+        # G/RT of each specie over the common temperature range of the species
+        thermo = NASATable(np.array(names))
+        temps = np.linspace(np.max(thermo.tlow), np.min(thermo.thigh), 16)
+        H_RT, S_R = _nasa_properties(thermo.coefs(temps), temps)
+        G_RT = H_RT - S_R
+    species, coefs, reactants, products = _draw_reactions(rng, n_species, is_reversible, G_RT)
+
+    with open(out_file, 'w') as f:
+        f.write('<?xml version="1.0"?>\n\n<ctml>\n\n  <phase>\n'
+                '      <speciesArray> {} </speciesArray>\n  </phase>\n\n'.format(' '.join(names)))
+        f.write('  <reactionData id="synthetic_mechanism">\n')
+        for j in range(n_reactions):
+            sides = [[(names[i], c) for i, c in zip(species[side], coefs[side]) if c > 0]
+                     for side in (reactants[j], products[j])]
+            arrow = '[=]' if is_reversible[j] else '=]'
+            equation = ' {} '.format(arrow).join(' + '.join(('' if c == 1 else str(c)) + name for name, c in side)
+                                                for side in sides)
+            f.write('    <reaction reversible="{}" type="Elementary" id="reaction{:02d}">\n'
+                    '      <equation>{}</equation>\n'
+                    '      <rateCoeff>\n        {}\n      </rateCoeff>\n'
+                    '      <reactants>{}</reactants>\n'
+                    '      <products>{}</products>\n'
+                    '    </reaction>\n\n'.format('yes' if is_reversible[j] else 'no', j + 1, equation,
+                                                 _coefficient_xml(COEFTYPES[types[j]], rng),
+                                                 ' '.join('{}:{}'.format(name, c) for name, c in sides[0]),
+                                                 ' '.join('{}:{}'.format(name, c) for name, c in sides[1])))
+        f.write('  </reactionData>\n\n</ctml>\n')
+    return out_file
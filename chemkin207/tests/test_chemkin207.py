@@ -7,7 +7,7 @@
     """
 import numpy as np
 import os
-from chemkin207 import ReactionSet,MultiReactionOutput
+from chemkin207 import ReactionSet,MultiReactionOutput,NASATable
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
@@ -42,6 +42,78 @@ def test_reaction_coef_rev():
     assert(np.isclose(rrr.reaction_coefs(200)[0][0], 19066566282.668961))
     assert(np.isclose(rrr.reaction_coefs(200)[0][1], 2.43147163435558e+27))
 
+def test_compiled_mechanism():
+    x = np.array([2., 1., .5, 1., 1., 1., .5, 1.])
+    path = os.path.join(BASE_DIR, 'test_xmls/rxns_rev.xml')
+    rrr = ReactionSet(path)
+    assert(rrr.vprime.shape == (8, 11) and rrr.v2prime.shape == (8, 11))
+    assert(rrr.reversible.sum() == rrr.number_reverse)
+    # the compiled path must agree with evaluating the reactions one at a time
+    rates = sum(react.reaction_rate(x, 750) for react in rrr.reactions)
+    assert(np.allclose(rrr.reaction_rates(x, 750), rates, rtol=1e-12))
+    progress = [react.progress_rate(x, 750) for react in rrr.reactions]
+    assert(np.allclose(rrr.progress_rates(x, 750), progress, rtol=1e-12))
+
+def test_reaction_rates_temperature_array():
+    x = np.array([2., 1., .5, 1., 1., 1., .5, 1.])
+    temps = np.linspace(300, 3000, 7)
+    path = os.path.join(BASE_DIR, 'test_xmls/rxns_rev.xml')
+    rrr = ReactionSet(path)
+    rates = rrr.reaction_rates(x, temps)
+    progress = rrr.progress_rates(x, temps)
+    kf, kb = rrr.reaction_coefs(temps)
+    assert(rates.shape == (7, 8) and progress.shape == (7, 11) and kf.shape == (7, 11))
+    for i, t in enumerate(temps):
+        assert(np.allclose(rates[i], rrr.reaction_rates(x, t), rtol=1e-12))
+        assert(np.allclose(progress[i], rrr.progress_rates(x, t), rtol=1e-12))
+        assert(np.allclose(kf[i], [c[0] for c in rrr.reaction_coefs(t)], rtol=1e-12))
+    assert(np.isnan(kb[:, ~rrr.reversible]).all())
+    try:
+        rrr.reaction_rates(x, [[300., 400.]])
+    except ValueError as err:
+        assert(type(err)==ValueError)
+
+def test_reaction_rates_batch():
+    path = os.path.join(BASE_DIR, 'test_xmls/rxns_rev.xml')
+    rrr = ReactionSet(path)
+    x = np.random.RandomState(0).uniform(0., 2., (9, 8))
+    temps = np.linspace(300, 3000, 9)
+    rates = rrr.reaction_rates_batch(x, temps, chunk_size=4)
+    progress = rrr.progress_rates_batch(x, temps)
+    assert(rates.shape == (9, 8) and progress.shape == (9, 11))
+    for i in range(9):
+        assert(np.allclose(rates[i], rrr.reaction_rates(x[i], temps[i]), rtol=1e-12))
+        assert(np.allclose(progress[i], rrr.progress_rates(x[i], temps[i]), rtol=1e-12))
+    try:
+        rrr.reaction_rates_batch(x, temps[:3])
+    except ValueError as err:
+        assert(type(err)==ValueError)
+    try:
+        rrr.reaction_rates_batch(x[:, :3], temps)
+    except ValueError as err:
+        assert(type(err)==ValueError)
+    try:
+        rrr.reaction_rates_batch(x, temps, chunk_size=0)
+    except ValueError as err:
+        assert(type(err)==ValueError)
+
+def test_thread_safe_evaluation():
+    from concurrent.futures import ThreadPoolExecutor
+    x = np.array([2., 1., .5, 1., 1., 1., .5, 1.])
+    path = os.path.join(BASE_DIR, 'test_xmls/rxns_rev.xml')
+    rrr = ReactionSet(path, cache_size=8)
+    temps = np.linspace(300, 3000, 40)
+    expected = [ReactionSet(path).reaction_rates(x, t) for t in temps]
+    with ThreadPoolExecutor(4) as pool:
+        rates = list(pool.map(lambda t: rrr.reaction_rates(x, t), temps))
+    assert(all(np.array_equal(r, e) for r, e in zip(rates, expected)))
+    # evaluating a reaction leaves its parameters untouched
+    react = rrr.reactions[0]
+    k = react.k
+    react.reaction_coef(1000)
+    react.progress_rate(x, 1000)
+    assert(react.k == k and not hasattr(react, 'w') and not hasattr(react, 'kb'))
+
 def test_reaction_rates_rev_low():
     x = np.array([2., 1., .5, 1., 1., 1., .5, 1.]).T
     path = os.path.join(BASE_DIR, 'test_xmls/rxns_rev.xml')
@@ -107,6 +179,52 @@ def test_uneven_out_bounds():
     except ValueError as err:
         assert(type(err)==ValueError)
 
+def test_nasa_table():
+    species = ['H', 'O', 'OH', 'H2', 'H2O', 'O2', 'HO2', 'H2O2']
+    table = NASATable(species)
+    assert(table.low.shape == (8, 7) and table.high.shape == (8, 7))
+    # the split point and the bounds select the low and high ranges as the database query did
+    assert(np.array_equal(table.coefs(1000.), table.low))
+    assert(np.array_equal(table.coefs(200.), table.low))
+    assert(np.array_equal(table.coefs(3500.), table.high))
+    assert(np.array_equal(table.coefs([300., 1500.]), np.array([table.low, table.high])))
+    for T in [199., 3501.]:
+        try:
+            table.coefs(T)
+        except ValueError as err:
+            assert(type(err)==ValueError)
+    try:
+        NASATable(['H', 'XX']).coefs(500.)
+    except ValueError as err:
+        assert(type(err)==ValueError)
+
+def test_coef_db_access():
+    import sqlite3
+    import threading
+    from chemkin207.chemkin207 import _coef_db, COEF_DB
+    db = _coef_db()
+    assert(db is _coef_db(COEF_DB))
+    indexes = db.execute("SELECT name FROM sqlite_master WHERE type = 'index'").fetchall()
+    assert(('COEF_SQL_SPECIES_RANGE',) in indexes)
+    try:
+        db.execute("DELETE FROM COEF_SQL")
+    except sqlite3.OperationalError as err:
+        assert(type(err)==sqlite3.OperationalError)
+    # the parameterized query selects the same coefficients as the in-memory table
+    rrr = ReactionSet(os.path.join(BASE_DIR, 'test_xmls/rxns_rev.xml'))
+    react = rrr.reactions[0]
+    query, params = react.get_query(db.cursor(), 1500)
+    rows = dict((row[0], row[1:]) for row in db.execute(query, params).fetchall())
+    assert(np.array_equal([rows[s] for s in rrr.species], react.get_nasa_coefs(1500)))
+    # each thread gets its own connection
+    connections = []
+    threads = [threading.Thread(target=lambda: connections.append(_coef_db())) for i in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert(len(set(map(id, connections + [db]))) == 3)
+
 def test_set_params():
     path = os.path.join(BASE_DIR, 'test_xmls/reaction_coef_1.xml')
     rrr = ReactionSet(path)
@@ -114,6 +232,65 @@ def test_set_params():
     rrr.set_params(1,k=10,coeftype='Constant')
     assert(rrr.reaction_coefs(900)[1][0]==10.0)
 
+def test_coef_cache():
+    x = np.array([2., 1., .5, 1., 1., 1., .5, 1.])
+    path = os.path.join(BASE_DIR, 'test_xmls/rxns_rev.xml')
+    cached = ReactionSet(path, cache_size=2)
+    plain = ReactionSet(path)
+    assert(plain.cache_info() == (0, 0, 0, 0))
+    for T in [750., 750., 900.]:
+        assert(np.allclose(cached.reaction_rates(x, T), plain.reaction_rates(x, T), rtol=1e-12))
+    assert(cached.cache_info() == (1, 2, 2, 2))
+    cached.progress_rates(x, [750., 1000.])
+    assert(cached.cache_info() == (2, 3, 2, 2))
+    # set_params invalidates the cached coefficients
+    cached.set_params(0, A=1e10)
+    plain.set_params(0, A=1e10)
+    assert(np.allclose(cached.progress_rates(x, 750.), plain.progress_rates(x, 750.), rtol=1e-12))
+    assert(cached.cache_info() == (2, 4, 2, 1))
+    cached.cache_clear()
+    assert(cached.cache_info() == (0, 0, 2, 0))
+    # batches, sweeps and long arrays of distinct temperatures neither fill nor evict the cache
+    cached.reaction_rates(x, 750.)
+    temps = np.linspace(800., 1200., 50)
+    rates = cached.reaction_rates_batch(np.tile(x, (50, 1)), temps, chunk_size=16)
+    assert(np.allclose(rates, plain.reaction_rates(x, temps), rtol=1e-12))
+    cached.to_table(['H2', 'O'], x, temps, None, save_output=False)
+    cached.progress_rates(x, temps)
+    assert(cached.cache_info() == (0, 1, 2, 1))
+    try:
+        ReactionSet(path, cache_size=-1)
+    except ValueError as err:
+        assert(type(err)==ValueError)
+
+def test_tabulate():
+    path = os.path.join(BASE_DIR, 'test_xmls/rxns_rev.xml')
+    rrr = ReactionSet(path)
+    temps = np.linspace(300, 3000, 101)
+    kf, kb = rrr.reaction_coefs(temps)
+    table = rrr.tabulate(250, 3200, rtol=1e-5)
+    assert(table.error <= 1e-5 and rrr.table is table)
+    kf_tab, kb_tab = rrr.reaction_coefs(temps)
+    assert(np.allclose(kf_tab, kf, rtol=1e-5, atol=0))
+    assert(np.allclose(kb_tab[:, rrr.reversible], kb[:, rrr.reversible], rtol=1e-5, atol=0))
+    # outside the table the coefficients are exact
+    assert(np.array_equal(rrr.reaction_coefs(3400)[0], ReactionSet(path).reaction_coefs(3400)[0]))
+    # set_params rebuilds the table
+    rrr.set_params(0, A=1e10)
+    exact = ReactionSet(path)
+    exact.set_params(0, A=1e10)
+    assert(np.isclose(rrr.reaction_coefs(1000)[0][0], exact.reaction_coefs(1000)[0][0], rtol=1e-5))
+    rrr.untabulate()
+    assert(rrr.table is None)
+    try:
+        rrr.tabulate(250, 3200, rtol=1e-12, max_points=100)
+    except ValueError as err:
+        assert(type(err)==ValueError)
+    try:
+        rrr.tabulate(100, 3200)
+    except ValueError as err:
+        assert(type(err)==ValueError)
+
 def test_init_value_error(): # Hits test in get_reaction
     try:
         path = os.path.join(BASE_DIR, 'test_xmls/reaction_init_value_1.xml')
@@ -510,6 +687,17 @@ def test_reversible_input():
     for index, ele in enumerate(expected_dict):
         assert expected_species[index] == actual_dict['species'][index]
 
+def test_import_time():
+    # plotting and hdf5 libraries must not be loaded by the package import
+    import subprocess
+    import sys
+    code = ('import sys, time; t = time.perf_counter(); import chemkin207; '
+            'print(time.perf_counter() - t, *[m for m in ("matplotlib", "h5py") if m in sys.modules])')
+    out = subprocess.check_output([sys.executable, '-c', code], cwd=os.path.dirname(os.path.dirname(BASE_DIR)))
+    out = out.decode().split()
+    assert(out[1:] == [])
+    assert(float(out[0]) < 2.0)
+
 def test_plot_rates_against_temp():
     path = os.path.join(BASE_DIR,'test_xmls/reaction_rate_1.xml')
     rs = ReactionSet(path)
@@ -623,6 +811,38 @@ def test_find_rates():
     except TypeError as err:
         assert(type(err)==TypeError)
 
+def test_parallel_sweeps():
+    from concurrent.futures import ThreadPoolExecutor
+    path = os.path.join(BASE_DIR, 'test_xmls/rxns_rev.xml')
+    rs = ReactionSet(path)
+    con = np.array([2., 1., .5, 1., 1., 1., .5, 1.])
+    temps = np.linspace(300, 3000, 1000)
+    serial = rs.to_table(['H2', 'O'], con, temps, 'trash', save_output=False)
+    parallel = rs.to_table(['H2', 'O'], con, temps, 'trash', save_output=False, workers=2)
+    assert(np.array_equal(serial, parallel))
+    with ThreadPoolExecutor(2) as pool:
+        assert(rs.find_rates(['H2', 'O'], con, temps, 'max', executor=pool) == rs.find_rates(['H2', 'O'], con, temps, 'max'))
+    try:
+        rs.find_rates('H2', con, temps, 'max', workers=0)
+    except ValueError as err:
+        assert(type(err)==ValueError)
+
+def test_find_rates_refine():
+    path = os.path.join(BASE_DIR, 'test_xmls/rxns_rev.xml')
+    rs = ReactionSet(path)
+    con = np.array([2., 1., .5, 1., 1., 1., .5, 1.])
+    fine = rs.find_rates(['H2', 'O2'], con, np.linspace(1500, 3500, 200001), 'max')
+    coarse = rs.find_rates(['H2', 'O2'], con, np.linspace(1500, 3500, 21), 'max')
+    refined = rs.find_rates(['H2', 'O2'], con, np.linspace(1500, 3500, 21), 'max', refine=True, xtol=1e-4)
+    for f, c, r in zip(fine, coarse, refined):
+        assert(abs(r[1] - f[1]) <= 0.01 and r[0] >= f[0] - 1e-9*abs(f[0]) and r[0] >= c[0])
+    rate, T = rs.find_rates('H2', con, [1500, 1600, 1700], 'min', refine=True)
+    assert(1500 <= T <= 1700)
+    try:
+        rs.find_rates('H2', con, [1500, 1600], 'min', refine=True, xtol=0)
+    except ValueError as err:
+        assert(type(err)==ValueError)
+
 def test_multireaction():
     path = os.path.join(BASE_DIR,'test_xmls/reaction_rate_1.xml')
     rs = ReactionSet(path)
@@ -661,3 +881,342 @@ def test_to_table_multi():
         mr.to_table_multi(['H2','O'],[con1,con2],['q',1300,6000],'test_tables')
     except TypeError as err:
         assert(type(err)==TypeError)
+
+def test_single_evaluation_sweeps():
+    path = os.path.join(BASE_DIR, 'test_xmls/rxns_rev.xml')
+    rs = ReactionSet(path)
+    con = np.array([2., 1., .5, 1., 1., 1., .5, 1.])
+    temps = np.linspace(300, 3000, 600)
+    calls = []
+    progress_rates = rs._progress_rates
+    def counted(x, T, cached=True):
+        calls.append(len(np.atleast_1d(T)))
+        return progress_rates(x, T, cached)
+    rs._progress_rates = counted
+    table = rs.to_table(list(rs.species), con, temps, 'trash', save_output=False)
+    assert(len(calls) == 3 and sum(calls) == len(temps))
+    del rs._progress_rates
+    expected = rs.reaction_rates(con, temps)
+    assert(np.array_equal(table[1:, 1:].astype(float), expected))
+    h2 = list(rs.species).index('H2')
+    assert(rs.find_rates(['O', 'H2'], con, temps, 'min')[1][0] == expected[:, h2].min())
+    try:
+        rs.to_table(['H2', 'O'], con, [300, 'hot'], 'trash', save_output=False)
+    except TypeError as err:
+        assert(type(err)==TypeError)
+
+def test_integrate():
+    path = os.path.join(BASE_DIR, 'test_xmls/rxns_rev.xml')
+    rs = ReactionSet(path)
+    x0 = np.array([2., 1., .5, 1., 1., 1., .5, 1.])
+    sol = rs.integrate(x0, 1500., (0, 1e-5), dense_output=True)
+    assert(sol.success and np.allclose(sol.y[:, 0], x0))
+    # hydrogen and oxygen atoms of H, O, OH, H2, H2O, O2, HO2, H2O2 are conserved
+    atoms = np.array([[1, 0, 1, 2, 2, 0, 1, 2], [0, 1, 1, 0, 1, 2, 2, 2]])
+    assert(np.allclose(np.dot(atoms, sol.y), np.dot(atoms, x0).reshape(-1, 1), rtol=1e-6))
+    assert(np.allclose(sol.sol(sol.t[-1]), sol.y[:, -1]))
+    assert(np.allclose(sol.y[:, 1] - x0, rs.reaction_rates(x0, 1500.)*sol.t[1], rtol=1e-2, atol=1e-9))
+    try:
+        rs.integrate(x0, [1500., 1600.], (0, 1e-5))
+    except ValueError as err:
+        assert(type(err)==ValueError)
+    try:
+        rs.integrate(-x0, 1500., (0, 1e-5))
+    except ValueError as err:
+        assert(type(err)==ValueError)
+
+def test_jacobian():
+    path = os.path.join(BASE_DIR, 'test_xmls/rxns_rev.xml')
+    rs = ReactionSet(path)
+    x = np.array([2., 0., .5, 1., 1., 1., .5, 1.])
+    rates, jac = rs.jacobian(x, 1500., rates=True)
+    assert(np.allclose(rates, rs.reaction_rates(x, 1500.)))
+    h = 1e-6
+    for k in range(len(x)):
+        dx = np.zeros(len(x))
+        dx[k] = h
+        fd = (rs.reaction_rates(x + dx, 1500.) - rates)/h
+        assert(np.allclose(jac[:, k], fd, rtol=1e-4, atol=1e-6*np.abs(jac).max()))
+    try:
+        rs.jacobian(x, [1500., 1600.])
+    except ValueError as err:
+        assert(type(err)==ValueError)
+
+def test_temperature_derivatives():
+    path = os.path.join(BASE_DIR, 'test_xmls/rxns_rev.xml')
+    rs = ReactionSet(path)
+    x = np.array([2., 1., .5, 1., 1., 1., .5, 1.])
+    T, h = np.array([800., 1500., 2500.]), 1e-3
+    dkf, dkb = rs.reaction_coefs_dT(T)
+    kf_hi, kb_hi = rs.reaction_coefs(T + h)
+    kf_lo, kb_lo = rs.reaction_coefs(T - h)
+    assert(np.allclose(dkf, (kf_hi - kf_lo)/(2*h), rtol=1e-6))
+    assert(np.allclose(dkb, (kb_hi - kb_lo)/(2*h), rtol=1e-6))
+    rates = (rs.reaction_rates(x, T + h) - rs.reaction_rates(x, T - h))/(2*h)
+    assert(np.allclose(rs.reaction_rates_dT(x, T), rates, rtol=1e-6))
+    assert(np.allclose(rs.reaction_rates_dT(x, 1500.), rates[1], rtol=1e-6))
+    try:
+        rs.reaction_coefs_dT('hot')
+    except TypeError as err:
+        assert(type(err)==TypeError)
+
+def test_sparse_stoichiometry():
+    path = os.path.join(BASE_DIR, 'test_xmls/rxns_rev.xml')
+    rrr = ReactionSet(path)
+    vprime = np.hstack([react.vprime for react in rrr.reactions])
+    v2prime = np.hstack([react.v2prime for react in rrr.reactions])
+    assert(rrr.reactants.nnz == np.count_nonzero(vprime) and rrr.products.nnz == np.count_nonzero(v2prime))
+    assert(np.array_equal(rrr.vprime, vprime) and np.array_equal(rrr.nu, v2prime - vprime))
+    x = np.array([[2., 1., .5, 1., 1., 1., .5, 1.], [0., 1., 2., 0., 1., 3., .5, 1.]])
+    assert(np.allclose(rrr.reactants.products(x), np.prod(x[:, :, None]**vprime, axis=1)))
+    w = np.arange(22.).reshape(2, 11)
+    assert(np.allclose(rrr.net.to_species(w), np.dot(w, (v2prime - vprime).T)))
+    assert(np.allclose(rrr.net.to_reactions(x), np.dot(x, v2prime - vprime)))
+    assert(np.array_equal(rrr.gammas, np.sum(v2prime - vprime, axis=0)))
+
+def test_streaming_parser():
+    path = os.path.join(BASE_DIR, 'test_xmls/rxns_test_reversible_input.xml')
+    params = ReactionSet(path).get_params()
+    vprime = np.hstack([react['vprime'] for react in params['reactions']])
+    v2prime = np.hstack([react['v2prime'] for react in params['reactions']])
+    assert(np.array_equal(params['reactants'].toarray(), vprime))
+    assert(np.array_equal(params['products'].toarray(), v2prime))
+    assert(params['reactions'][0]['reactants'] == {0: 1., 5: 1.})
+    # the dense vectors are built from the sparse entries when looked up
+    assert('vprime' not in params['reactions'][0] and 'v2prime' not in params['reactions'][0])
+    assert(np.array_equal(params['reactions'][0].get('vprime'), vprime[:, :1]))
+    # the parameter arrays come from the parsed data, without building the reaction objects
+    rrr = ReactionSet(path)
+    assert(rrr._reactions is None)
+    assert(np.array_equal(rrr.As, [r.A for r in rrr.reactions]) and np.array_equal(rrr.Rs, [r.R for r in rrr.reactions]))
+    assert(np.array_equal(rrr.reversible, [r.rev for r in rrr.reactions]))
+    try:
+        ReactionSet(os.path.join(BASE_DIR, 'test_xmls/rxns_test_unexpected_reactant.xml'))
+    except ValueError as err:
+        assert('Unobtanium' in str(err))
+
+def test_compiled_mechanism_cache():
+    import tempfile, shutil
+    compiled_dir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(BASE_DIR, 'test_xmls/rxns_rev.xml')
+        x = np.array([2., 1., .5, 1., 1., 1., .5, 1.])
+        parsed = ReactionSet(path, compiled_dir=compiled_dir)
+        assert(len(os.listdir(compiled_dir)) == 1)
+        loaded = ReactionSet(path, compiled_dir=compiled_dir)
+        # the compiled mechanism is memory mapped, and the xml is not parsed again
+        assert(isinstance(loaded.As, np.memmap) and loaded._param_dict is None)
+        assert(np.array_equal(loaded.reaction_rates(x, [800., 1500.]), parsed.reaction_rates(x, [800., 1500.])))
+        assert(str(loaded) == str(parsed) and loaded._reactions is None)
+        assert(np.array_equal(loaded.get_params()['reactions'][3]['vprime'], parsed.get_params()['reactions'][3]['vprime']))
+        loaded.set_params(0, A=2.)
+        parsed.set_params(0, A=2.)
+        assert(np.array_equal(loaded.reaction_rates(x, 1500.), parsed.reaction_rates(x, 1500.)))
+        ReactionSet(os.path.join(BASE_DIR, 'test_xmls/rxns.xml'), compiled_dir=compiled_dir)
+        assert(len(os.listdir(compiled_dir)) == 2)
+    finally:
+        shutil.rmtree(compiled_dir)
+
+def test_to_hdf5():
+    import h5py, tempfile, shutil
+    out_dir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(BASE_DIR, 'test_xmls/rxns_rev.xml')
+        rs = ReactionSet(path)
+        con = np.array([2., 1., .5, 1., 1., 1., .5, 1.])
+        temps = np.linspace(300, 3000, 1000)
+        filename = rs.to_hdf5(['H2', 'O'], con, temps, os.path.join(out_dir, 'sweep'))
+        table = rs.to_table(['H2', 'O'], con, temps, 'trash', save_output=False)
+        with h5py.File(filename, 'r') as root:
+            rates = root['rates']
+            assert(rates.dtype == np.float64 and rates.compression == 'gzip' and rates.chunks is not None)
+            assert(np.array_equal(rates[:], table[1:, 1:].astype(float)))
+            assert(np.array_equal(rates.dims[0][0][:], temps))
+            assert(list(rates.dims[1][0].asstr()[:]) == ['H2', 'O'])
+        try:
+            rs.to_hdf5(['H2', 'O'], con, [1010, 'e'], os.path.join(out_dir, 'bad'))
+        except TypeError as err:
+            assert(type(err)==TypeError)
+        assert(not os.path.exists(os.path.join(out_dir, 'bad.hdf5')))
+        try:
+            rs.to_hdf5(['H2', 'O'], con[:2], temps, os.path.join(out_dir, 'bad'))
+        except ValueError as err:
+            assert(type(err)==ValueError)
+        assert(not os.path.exists(os.path.join(out_dir, 'bad.hdf5')))
+    finally:
+        shutil.rmtree(out_dir)
+
+def test_typed_table_output():
+    import tempfile, shutil
+    out_dir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(BASE_DIR,'test_xmls/reaction_rate_1.xml')
+        rs = ReactionSet(path)
+        con = np.array([[1.],[2.],[1.]])
+        tab = rs.to_table(['H2','O'],con,[120,1300],os.path.join(out_dir,'rates'),'txt')
+        assert(tab.rates.dtype == np.float64 and tab.temps.dtype == np.float64)
+        assert(np.array_equal(tab.rates, [[-60.,-70.],[-60.,-70.]]) and tab.shape == (3,3))
+        with open(os.path.join(out_dir,'rates.txt')) as f:
+            assert(f.read().splitlines() == ['T\tH2\tO', '120\t-6.00e+01\t-7.00e+01', '1300\t-6.00e+01\t-7.00e+01'])
+        rs.to_table(['H2','O'],con,[120.5,1300],os.path.join(out_dir,'rates'),'csv')
+        with open(os.path.join(out_dir,'rates.csv')) as f:
+            assert(f.read().splitlines() == ['T,H2,O', '120.5,-60.0,-70.0', '1300.0,-60.0,-70.0'])
+        # no temperatures give the header only
+        tab = rs.to_table(['H2'],con,[],os.path.join(out_dir,'empty'),'csv')
+        assert(np.asarray(tab).tolist() == [['T','H2']] and tab.shape == (1,2))
+        with open(os.path.join(out_dir,'empty.csv')) as f:
+            assert(f.read().splitlines() == ['T,H2'])
+        # indexing builds the selected rows only
+        tab = rs.to_table(['H2','O'],con,[120,1300],None,save_output=False)
+        assert(tab[0,1] == 'H2' and tab[2,0] == 1300 and tab[1,2] == -70.)
+        assert(np.array_equal(tab[1:,1:], np.asarray(tab)[1:,1:]) and tab[-1].tolist() == [1300,-60.,-70.])
+    finally:
+        shutil.rmtree(out_dir)
+
+def test_rates_hdf5():
+    import h5py, tempfile, shutil
+    out_dir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(BASE_DIR, 'test_xmls/rxns_rev.xml')
+        rs = ReactionSet(path)
+        x = np.random.RandomState(0).rand(1000, 8)
+        T = np.linspace(300, 3000, 1000)
+        in_file = os.path.join(out_dir, 'snapshot.h5')
+        with h5py.File(in_file, 'w') as root:
+            root['cells/x'] = x
+            root['cells/T'] = T
+        out_file = rs.rates_hdf5(in_file, 'cells/x', 'cells/T', progress='progress', chunk_size=64)
+        assert(out_file == in_file)
+        with h5py.File(out_file, 'r') as root:
+            assert(np.array_equal(root['rates'][:], rs.reaction_rates_batch(x, T)))
+            assert(np.array_equal(root['progress'][:], rs.progress_rates_batch(x, T)))
+        other = os.path.join(out_dir, 'rates.h5')
+        assert(rs.rates_hdf5(in_file, 'cells/x', 'cells/T', other) == other)
+        try:
+            rs.rates_hdf5(in_file, 'cells/x', 'cells/T', other)
+        except ValueError as err:
+            assert(type(err)==ValueError)
+        try:
+            rs.rates_hdf5(in_file, 'cells/T', 'cells/T', other, 'bad')
+        except ValueError as err:
+            assert(type(err)==ValueError)
+        # a failing chunk removes the outputs, so the evaluation can be retried
+        with h5py.File(in_file, 'a') as root:
+            root['cells/T'][900] = -1.
+        try:
+            rs.rates_hdf5(in_file, 'cells/x', 'cells/T', other, 'retry', 'retry_progress', chunk_size=64)
+        except ValueError as err:
+            assert(type(err)==ValueError)
+        with h5py.File(other, 'r') as root:
+            assert('retry' not in root and 'retry_progress' not in root and 'rates' in root)
+        fresh = os.path.join(out_dir, 'fresh.h5')
+        try:
+            rs.rates_hdf5(in_file, 'cells/x', 'cells/T', fresh, chunk_size=64)
+        except ValueError as err:
+            assert(type(err)==ValueError)
+        assert(not os.path.exists(fresh))
+        with h5py.File(in_file, 'a') as root:
+            root['cells/T'][900] = T[900]
+        rs.rates_hdf5(in_file, 'cells/x', 'cells/T', other, 'retry', chunk_size=64)
+        with h5py.File(other, 'r') as root:
+            assert(np.array_equal(root['retry'][:], rs.reaction_rates_batch(x, T)))
+    finally:
+        shutil.rmtree(out_dir)
+
+def test_to_npy():
+    import tempfile, shutil
+    out_dir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(BASE_DIR, 'test_xmls/rxns_rev.xml')
+        rs = ReactionSet(path)
+        con = np.array([2., 1., .5, 1., 1., 1., .5, 1.])
+        temps = np.linspace(300, 3000, 1000)
+        filename = rs.to_npy(['H2', 'O'], con, temps, os.path.join(out_dir, 'sweep'))
+        table = rs.to_table(['H2', 'O'], con, temps, 'trash', save_output=False)
+        out = np.load(filename, mmap_mode='r')
+        assert(out.dtype == np.float64 and out.shape == (1000, 3))
+        assert(np.array_equal(out[:, 0], temps) and np.array_equal(out[:, 1:], table.rates))
+        del out
+        try:
+            rs.to_npy(['H2', 'O'], con, [1010, 'e'], os.path.join(out_dir, 'bad'))
+        except TypeError as err:
+            assert(type(err)==TypeError)
+        assert(not os.path.exists(os.path.join(out_dir, 'bad.npy')))
+    finally:
+        shutil.rmtree(out_dir)
+
+def test_pipelined_table_output():
+    import tempfile, shutil
+    out_dir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(BASE_DIR, 'test_xmls/rxns_rev.xml')
+        rs = ReactionSet(path)
+        con = np.array([2., 1., .5, 1., 1., 1., .5, 1.])
+        temps = np.linspace(300, 3000, 20000)
+        tab = rs.to_table(['H2', 'O'], con, temps, os.path.join(out_dir, 'rates'), 'txt')
+        with open(os.path.join(out_dir, 'rates.txt')) as f:
+            lines = f.read().splitlines()
+        assert(len(lines) == 20001 and np.array_equal(tab.rates, rs.to_table(['H2', 'O'], con, temps, 'trash', save_output=False).rates))
+        assert(lines[-1] == '\t'.join(format(v, '.2e') for v in [temps[-1]] + list(tab.rates[-1])))
+        rm = MultiReactionOutput([ReactionSet(path), ReactionSet(path), ReactionSet(path)])
+        rm.to_table_multi(['H2', 'O'], [con]*3, temps[:100], out_dir, 'csv')
+        assert(sorted(os.listdir(os.path.join(out_dir, 'supporting'))) == ['reaction0.csv', 'reaction1.csv', 'reaction2.csv'])
+        try:
+            rm.to_table_multi(['H2', 'O'], [con]*3, temps[:100], out_dir, 'mike')
+        except TypeError as err:
+            assert(type(err)==TypeError)
+    finally:
+        shutil.rmtree(out_dir)
+
+def test_benchmark():
+    import json
+    from chemkin207 import benchmark
+    report = benchmark.run(sizes=((5, 4), (8, 12)), repeat=1, n_temps=5, number=1)
+    report = json.loads(json.dumps(report))
+    assert(report['version'] == benchmark.RESULTS_VERSION and 'numpy' in report['environment'])
+    sizes = sorted(set((r['mechanism']['species'], r['mechanism']['reactions']) for r in report['results']))
+    assert(sizes == [(5, 4), (8, 12)])
+    names = set(r['name'] for r in report['results'])
+    assert(names >= {'get_reactions', 'reaction_coefs', 'progress_rates', 'reaction_rates',
+                     'get_nasa_coefs', 'to_table', 'to_table_multi'})
+    assert(all(len(r['times']) == 1 and r['best'] > 0 for r in report['results']))
+
+def test_synthetic_mechanism():
+    import tempfile, shutil, filecmp
+    from chemkin207 import synthetic
+    out_dir = tempfile.mkdtemp()
+    try:
+        assert(len(synthetic.thermo_species()) == 53 and 'CH2(S)' in synthetic.thermo_species())
+        path = synthetic.synthetic_mechanism(os.path.join(out_dir, 'a.xml'), 20, 200, reversible=0.3, seed=1)
+        rs = ReactionSet(path)
+        assert(len(rs.species) == 20 and len(rs.As) == 200 and rs.number_reverse == 60)
+        assert(set(rs.species) <= set(synthetic.thermo_species()))
+        assert(set(rs.coeftypes) == set(synthetic.COEFTYPES))
+        rates = rs.reaction_rates(np.ones(20), np.linspace(300, 3000, 50))
+        assert(np.all(np.isfinite(rates)))
+        other = synthetic.synthetic_mechanism(os.path.join(out_dir, 'b.xml'), 20, 200, reversible=0.3, seed=1)
+        assert(filecmp.cmp(path, other, shallow=False))
+        rs = ReactionSet(synthetic.synthetic_mechanism(os.path.join(out_dir, 'c.xml'), 5, 10, reversible=0,
+                                                       coeftypes={'Arrhenius': 1}, seed=2))
+        assert(rs.number_reverse == 0 and set(rs.coeftypes) == {'Arrhenius'})
+        try:
+            synthetic.synthetic_mechanism(os.path.join(out_dir, 'd.xml'), 54, 10)
+        except ValueError as err:
+            assert(type(err)==ValueError)
+        try:
+            synthetic.synthetic_mechanism(os.path.join(out_dir, 'd.xml'), 5, 10, coeftypes={'Troe': 1})
+        except ValueError as err:
+            assert(type(err)==ValueError)
+    finally:
+        shutil.rmtree(out_dir)
+
+def test_tabulate_clears_cache():
+    path = os.path.join(BASE_DIR, 'test_xmls/rxns_rev.xml')
+    exact = ReactionSet(path).reaction_coefs(1234.5)[0]
+    rrr = ReactionSet(path, cache_size=8)
+    rrr.tabulate(250, 3200, rtol=1e-1)
+    coarse = rrr.reaction_coefs(1234.5)[0]
+    rrr.tabulate(250, 3200, rtol=1e-6)
+    fine = rrr.reaction_coefs(1234.5)[0]
+    assert(not np.allclose(coarse, exact, rtol=1e-6, atol=0))
+    assert(np.allclose(fine, exact, rtol=1e-6, atol=0))
@@ -4,7 +4,7 @@ from setuptools import setup
 setup(
     name = 'chemkin207',
     packages = ['chemkin207','chemkin207.tests'],
-    package_data={'chemkin207': ['supporting/*.sqlite','tests/test_xmls/*.xml','tests/test_tables/*.tex']},
+    package_data={'chemkin207': ['supporting/*.sqlite','supporting/thermo.txt','tests/test_xmls/*.xml','tests/test_tables/*.tex']},
     version = '0.1.13',
     description = 'Simple chemical kinetics library.',
     author = 'Paul Blankley, Ryan Janssen, Boyuan Sun',